@@ -0,0 +1,193 @@
+"""
+A deterministic generator of synthetic NBIB corpora for benchmarks.
+
+The records look like PubMed exports: long wrapped abstracts, many authors with affiliations,
+MeSH terms, repeated publication types and DOIs. Some records have unusual continuation lines
+(tab or deep indentation, trailing whitespace, Windows line endings or an 'ER' tag) like files from other tools.
+The same size and seed always produce the same corpus and nothing is downloaded.
+The first author of each record has a unique surname so that every record has a unique entry key.
+"""
+import argparse
+import random
+from pathlib import Path
+
+
+SYLLABLES = [
+    "ba", "ko", "ri", "lu", "sen", "ma", "to", "vic", "an", "del",
+    "mor", "ga", "ni", "ste", "her", "wa", "zu", "pe", "lin", "ros",
+]
+FORENAMES = [
+    "Carlo", "Arjan", "Margaret", "Holly", "Roberta", "Stephanie", "Lora", "Karen", "Wei", "Jürgen",
+    "Siobhán", "José", "Ayesha", "Kenji", "Olga", "Thandiwe", "Mateo", "Ingrid", "Priya", "Noor",
+]
+WORDS = [
+    "patients", "clinical", "syndrome", "genetic", "variant", "cohort", "analysis", "treatment", "outcomes",
+    "expression", "protein", "receptor", "significantly", "associated", "increased", "reduced", "randomized",
+    "trial", "mortality", "risk", "factors", "children", "adults", "disease", "cells", "tumor", "signaling",
+    "pathway", "inflammation", "diagnosis", "imaging", "therapy", "response", "resistance", "infection",
+    "hospital", "follow-up", "compared", "observed", "among", "within", "between", "however", "results",
+    "methods", "conclusions", "background", "pathogenic", "heterozygous", "mutations", "(p<0.001)", "95%",
+    "confidence", "interval", "hazard", "ratio", "meta-analysis", "systematic", "review", "incidence",
+]
+SECTIONS = ["BACKGROUND", "METHODS", "RESULTS", "CONCLUSIONS"]
+# Publication types in addition to 'Journal Article'
+PUBLICATION_TYPES = [
+    "Review", "Randomized Controlled Trial",
+    "Research Support, Non-U.S. Gov't", "Multicenter Study", "Case Reports", "Comparative Study",
+]
+MESH_TERMS = [
+    "Humans", "Female", "Male", "Adult", "Middle Aged", "Aged", "Child", "Infant", "Adolescent",
+    "Mutation", "Retrospective Studies", "Prospective Studies", "Treatment Outcome", "Risk Factors",
+    "Neoplasms/*genetics", "Syndrome", "Phenotype", "Genotype", "Cohort Studies", "Prognosis",
+]
+JOURNALS = [
+    ("Bioinformatics (Oxford, England)", "Bioinformatics", "1367-4811"),
+    ("The New England journal of medicine", "N Engl J Med", "1533-4406"),
+    ("Nature genetics", "Nat Genet", "1546-1718"),
+    ("PloS one", "PLoS One", "1932-6203"),
+    ("BMC medical genetics", "BMC Med Genet", "1471-2350"),
+]
+COUNTRIES = ["Netherlands", "Australia", "United States", "Japan", "Germany", "Brazil", "South Africa", "India"]
+LANGUAGES = ["eng", "eng", "eng", "eng", "ger", "fre", "jpn"]
+
+LINE_WIDTH = 80
+CONTINUATION_INDENT = " " * 6
+
+
+def unique_surname(number):
+    """ Returns a capitalized surname made of syllables which is unique for each non-negative number. """
+    syllables = []
+    while True:
+        number, remainder = divmod(number, len(SYLLABLES))
+        syllables.append(SYLLABLES[remainder])
+        if number == 0:
+            break
+        number -= 1
+    return "".join(syllables).capitalize()
+
+
+def sentence(rng, min_words=8, max_words=30):
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    return " ".join(words).capitalize() + "."
+
+
+def wrap(code, value, odd=False, rng=None):
+    """ Formats a line in NBIB format, wrapping long values onto continuation lines like PubMed. """
+    lines = []
+    line = f"{code:<4}- "
+    for word in value.split(" "):
+        if len(line) + len(word) > LINE_WIDTH and line.strip():
+            lines.append(line)
+            indent = CONTINUATION_INDENT
+            if odd:
+                indent = rng.choice([CONTINUATION_INDENT, "\t", " " * 12, "       "])
+            line = indent
+        line += word + " "
+    lines.append(line)
+    if not odd:
+        return [line.rstrip() for line in lines]
+    return lines
+
+
+def generate_record(rng, number):
+    """ Returns the lines of a synthetic record. The number makes its PMID and first author unique. """
+    pmid = 30000000 + number
+    year = rng.randint(1960, 2023)
+    journal, abbreviation, issn = rng.choice(JOURNALS)
+    odd = rng.random() < 0.1
+
+    record = []
+
+    def add(code, value):
+        record.extend(wrap(code, value, odd, rng))
+
+    add("PMID", str(pmid))
+    add("OWN", "NLM")
+    add("STAT", rng.choice(["MEDLINE", "PubMed-not-MEDLINE", "Publisher"]))
+    add("DCOM", f"{year + 1}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}")
+    add("LR", f"{rng.randint(year + 1, 2024)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}")
+    add("IS", f"{issn} (Electronic)")
+    add("IS", f"{issn[:-1]}{rng.randint(0, 9)} (Linking)")
+    add("VI", str(rng.randint(1, 400)))
+    add("IP", str(rng.randint(1, 24)))
+    add("DP", f"{year} {rng.choice(['Jan', 'Mar', 'Jun', 'Sep', 'Dec'])}")
+    add("TI", sentence(rng, 6, 40))
+    first_page = rng.randint(1, 9000)
+    add("PG", f"{first_page}-{first_page + rng.randint(1, 30)}")
+    doi = f"10.{rng.randint(1000, 9999)}/synthetic.{pmid}"
+    add("LID", f"{doi} [doi]")
+
+    abstract = " ".join(
+        f"{section}: " + " ".join(sentence(rng) for _ in range(rng.randint(1, 5))) for section in SECTIONS
+    )
+    add("AB", abstract)
+    add("CI", f"Copyright © {year} The Authors.")
+
+    for author_number in range(rng.choices([1, 3, 6, 12, 40], weights=[5, 30, 40, 20, 5])[0]):
+        surname = unique_surname(number) if author_number == 0 else unique_surname(rng.randrange(1000000))
+        forename = rng.choice(FORENAMES)
+        initials = forename[0] + rng.choice(["", "A", "M", "J"])
+        add("FAU", f"{surname}, {forename} {initials[1:]}".rstrip())
+        add("AU", f"{surname} {initials}")
+        add("AD", f"Department of {rng.choice(WORDS).capitalize()}, University of {rng.choice(SYLLABLES).capitalize()}"
+            f"{rng.choice(SYLLABLES)}, {rng.choice(COUNTRIES)}.")
+
+    add("LA", rng.choice(LANGUAGES))
+    add("PT", "Journal Article")
+    for publication_type in sorted(set(rng.choices(PUBLICATION_TYPES, k=rng.randint(0, 2))) - {"Journal Article"}):
+        add("PT", publication_type)
+    add("PL", rng.choice(COUNTRIES))
+    add("TA", abbreviation)
+    add("JT", journal)
+    for term in rng.sample(MESH_TERMS, rng.randint(3, 12)):
+        add("MH", term)
+    add("EDAT", f"{year}/{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d} 06:00")
+    add("CRDT", f"{year}/{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d} 06:00")
+    add("AID", f"{doi} [doi]")
+    add("AID", f"{pmid} [pii]")
+    add("SO", f"{abbreviation}. {year};{rng.randint(1, 400)}:{first_page}.")
+
+    if odd and rng.random() < 0.5:
+        record.append("ER  -")
+    return record
+
+
+def write_corpus(path, records, seed=0):
+    """
+    Writes a corpus of synthetic records to a file and returns its path.
+
+    About 10% of the records use Windows line endings and unusual continuation lines.
+    """
+    path = Path(path)
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for number in range(records):
+            lines = generate_record(rng, number)
+            newline = "\r\n" if number % 10 == 7 else "\n"
+            f.write(newline.join(lines))
+            f.write(newline + newline)
+    return path
+
+
+def corpus_path(directory, records, seed=0):
+    """ Returns the path of a corpus in a directory, writing it if it doesn't already exist. """
+    path = Path(directory) / f"synthetic-{records}-{seed}.nbib"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_suffix(".partial")
+        write_corpus(temporary_path, records, seed)
+        temporary_path.replace(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Writes a synthetic NBIB corpus.")
+    parser.add_argument("path", help="The path of the NBIB file to write.")
+    parser.add_argument("--records", type=int, default=1000, help="The number of records.")
+    parser.add_argument("--seed", type=int, default=0, help="The seed of the random number generator.")
+    args = parser.parse_args()
+    write_corpus(args.path, args.records, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Benchmarks of parsing synthetic NBIB corpora.
+
+Each benchmark runs in a new process so that its peak memory is measured on its own.
+The results are saved as JSON and can be compared with the results of an earlier run:
+
+    python -m benchmarks.run --sizes 1000 100000 --output results.json
+    python -m benchmarks.run --sizes 1000 100000 --compare results.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .corpus import corpus_path
+
+
+DEFAULT_SIZES = (1000, 100000)
+DEFAULT_CORPUS_DIR = Path(__file__).parent / "corpora"
+
+
+def peak_memory_bytes():
+    """ Returns the peak resident memory of this process in bytes or None if it cannot be measured. """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes and macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def bench_parse_string(path):
+    from pybtexnbib import NBIBParser
+
+    text = Path(path).read_text(encoding="utf-8")
+    start = time.perf_counter()
+    data = NBIBParser(cache=None).parse_string(text)
+    return time.perf_counter() - start, len(data.entries)
+
+
+def bench_parse_stream(path):
+    from pybtexnbib import NBIBParser
+
+    start = time.perf_counter()
+    with open(path, encoding="utf-8") as stream:
+        data = NBIBParser(cache=None).parse_stream(stream)
+    return time.perf_counter() - start, len(data.entries)
+
+
+def bench_parse_file(path):
+    from pybtexnbib import NBIBParser
+
+    start = time.perf_counter()
+    data = NBIBParser(cache=None).parse_file(str(path))
+    return time.perf_counter() - start, len(data.entries)
+
+
+def bench_format_from_file(path):
+    from pybtex import format_from_file
+
+    start = time.perf_counter()
+    text = format_from_file(str(path), style="plain", output_backend="plaintext", bib_format="nbib")
+    return time.perf_counter() - start, sum(1 for line in text.splitlines() if line.startswith("["))
+
+
+BENCHMARKS = {
+    "parse_string": bench_parse_string,
+    "parse_stream": bench_parse_stream,
+    "parse_file": bench_parse_file,
+    "format_from_file": bench_format_from_file,
+}
+
+
+def _run_benchmark(name, path):
+    # Measure parsing rather than loading from a cache set in the environment
+    os.environ.pop("PYBTEXNBIB_CACHE_DIR", None)
+    baseline = peak_memory_bytes()
+    seconds, records = BENCHMARKS[name](path)
+    return seconds, records, baseline, peak_memory_bytes()
+
+
+def run_benchmark(name, path):
+    """ Runs a benchmark on an NBIB file in a new process and returns a dict of its results. """
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        seconds, records, baseline, peak = executor.submit(_run_benchmark, name, str(path)).result()
+
+    return dict(
+        benchmark=name,
+        records=records,
+        file_bytes=Path(path).stat().st_size,
+        seconds=seconds,
+        records_per_second=records / seconds if seconds else None,
+        peak_memory_bytes=peak,
+        peak_memory_increase_bytes=peak - baseline if peak is not None else None,
+    )
+
+
+def git_revision():
+    """ Returns the git commit of the working tree or None if it isn't in a git repository. """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=Path(__file__).parent, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes=DEFAULT_SIZES, benchmarks=tuple(BENCHMARKS), corpus_dir=DEFAULT_CORPUS_DIR, seed=0, verbose=True):
+    """ Runs benchmarks on synthetic corpora of several sizes and returns the results as a dict. """
+    results = []
+    for size in sizes:
+        path = corpus_path(corpus_dir, size, seed)
+        for name in benchmarks:
+            result = run_benchmark(name, path)
+            result["size"] = size
+            results.append(result)
+            if verbose:
+                print(format_result(result), flush=True)
+
+    return dict(
+        created=datetime.now(timezone.utc).isoformat(),
+        python=platform.python_version(),
+        platform=platform.platform(),
+        cpu_count=os.cpu_count(),
+        git_revision=git_revision(),
+        seed=seed,
+        results=results,
+    )
+
+
+def format_result(result, previous=None):
+    line = (
+        f"{result['benchmark']:>16} {result['size']:>9} records: "
+        f"{result['records_per_second']:>10,.0f} records/s, {result['seconds']:8.2f} s"
+    )
+    if result["peak_memory_bytes"] is not None:
+        line += f", peak memory {result['peak_memory_bytes'] / 2**20:8.1f} MiB"
+    if previous:
+        line += f" ({result['records_per_second'] / previous['records_per_second']:.2f}x records/s)"
+    return line
+
+
+def compare(results, previous_results):
+    """ Returns lines comparing the records per second of two runs for the benchmarks they have in common. """
+    previous = {(result["benchmark"], result["size"]): result for result in previous_results["results"]}
+    return [
+        format_result(result, previous[(result["benchmark"], result["size"])])
+        for result in results["results"]
+        if (result["benchmark"], result["size"]) in previous
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks parsing synthetic NBIB corpora.")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help="The numbers of records in the corpora, e.g. 1000 100000 1000000.",
+    )
+    parser.add_argument(
+        "--benchmarks", nargs="+", choices=sorted(BENCHMARKS), default=list(BENCHMARKS), help="The benchmarks to run."
+    )
+    parser.add_argument(
+        "--corpus-dir", type=Path, default=DEFAULT_CORPUS_DIR, help="Where the generated corpora are kept."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="The seed for generating the corpora.")
+    parser.add_argument("--output", type=Path, help="A JSON file to save the results to.")
+    parser.add_argument("--compare", type=Path, help="A JSON file of earlier results to compare with.")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.benchmarks, args.corpus_dir, args.seed)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    if args.compare:
+        print(f"Compared with {args.compare}:")
+        for line in compare(results, json.loads(args.compare.read_text(encoding="utf-8"))):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmarks of the time taken to start using the plugin, which dominates many short pybtex-convert runs.
+
+Each measurement runs in a new Python process:
+    import: importing ``pybtexnbib.parsers`` after pybtex's database layer, which pybtex has always imported
+        by the time it loads a plugin.
+    find_plugin: resolving the parser through the ``pybtex.database.input`` entry point
+        (including pybtex's own imports).
+    parse_small_file: a whole process which resolves the plugin and parses a file with one record, like pybtex-convert.
+
+    python -m benchmarks.startup --runs 10
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from .corpus import write_corpus
+
+
+# Modules which are only needed for some features and must not be imported when the plugin is loaded
+LAZY_MODULES = (
+    "asyncio",
+    "concurrent.futures.process",
+    "concurrent.futures.thread",
+    "multiprocessing",
+    "pickle",
+    "json",
+    "hashlib",
+    "csv",
+    "gzip",
+    "pybtexris",
+    "pybtexnbib.stats",
+    "pybtexnbib.writer",
+    "pybtexnbib.index",
+    "pybtexnbib.columns",
+)
+
+IMPORT_SCRIPT = """
+import sys, time
+import pybtex.database.input, pybtex.database
+before = set(sys.modules)
+start = time.perf_counter()
+import pybtexnbib.parsers
+print(time.perf_counter() - start)
+print(" ".join(sorted(set(sys.modules) - before)))
+"""
+
+FIND_PLUGIN_SCRIPT = """
+import time
+start = time.perf_counter()
+from pybtex.plugin import find_plugin
+find_plugin("pybtex.database.input", "nbib")
+print(time.perf_counter() - start)
+"""
+
+PARSE_SMALL_FILE_SCRIPT = """
+import sys
+from pybtex.database import parse_file
+parse_file(sys.argv[1], bib_format="nbib")
+"""
+
+
+def run_script(script, *args):
+    """ Runs Python code in a new process and returns the lines it prints. """
+    result = subprocess.run(
+        [sys.executable, "-c", script, *args],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).parent.parent,
+    )
+    return result.stdout.splitlines()
+
+
+def import_time():
+    """ Returns the seconds taken to import the parser in a new process and the names of the modules it imported. """
+    seconds, modules = run_script(IMPORT_SCRIPT)
+    return float(seconds), modules.split()
+
+
+def find_plugin_time():
+    return float(run_script(FIND_PLUGIN_SCRIPT)[0])
+
+
+def parse_small_file_time(path):
+    import time
+
+    start = time.perf_counter()
+    run_script(PARSE_SMALL_FILE_SCRIPT, str(path))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the time taken to load the plugin in new processes.")
+    parser.add_argument("--runs", type=int, default=10, help="The number of processes started for each benchmark.")
+    parser.add_argument(
+        "--corpus-dir", type=Path, default=Path(__file__).parent / "corpora", help="Where the small file is written."
+    )
+    args = parser.parse_args()
+
+    args.corpus_dir.mkdir(parents=True, exist_ok=True)
+    path = write_corpus(args.corpus_dir / "startup-1.nbib", 1)
+    benchmarks = {
+        "import": lambda: import_time()[0],
+        "find_plugin": find_plugin_time,
+        "parse_small_file": lambda: parse_small_file_time(path),
+    }
+    for name, benchmark in benchmarks.items():
+        times = [benchmark() for _ in range(args.runs)]
+        print(
+            f"{name:>16}: min {min(times) * 1000:7.1f} ms, "
+            f"median {statistics.median(times) * 1000:7.1f} ms over {args.runs} processes",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,30 @@
-from .parsers import NBIBParser
\ No newline at end of file
+import importlib
+
+# The module of each public name. Modules are imported when a name is first used (PEP 562)
+# so that loading the parser or writer through pybtex's entry points doesn't import the rest of the package.
+_exports = {
+    "NBIBParser": ".parsers",
+    "NBIBWriter": ".writer",
+    "NBIBIndex": ".index",
+    "NBIBCache": ".cache",
+    "PersonCache": ".persons",
+    "ParseStatistics": ".stats",
+    "Diagnostics": ".diagnostics",
+    "NBIBRecord": ".tokenizer",
+    "aiter_entries": ".aio",
+    "NBIBTable": ".columns",
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name):
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_exports[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_exports))
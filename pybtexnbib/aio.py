@@ -0,0 +1,87 @@
+"""
+Parsing NBIB data from asynchronous streams without blocking the event loop.
+"""
+import codecs
+
+from .tokenizer import LineTokenizer
+
+
+DEFAULT_READ_SIZE = 64 * 1024
+
+
+async def aiter_chunks(stream, read_size=DEFAULT_READ_SIZE):
+    """
+    Yields chunks of bytes or text from an asynchronous stream.
+
+    The stream can have a coroutine ``read(size)`` method (e.g. ``asyncio.StreamReader`` or an aiofiles file)
+    or be an asynchronous iterable of chunks.
+    """
+    if hasattr(stream, "read"):
+        while True:
+            chunk = await stream.read(read_size)
+            if not chunk:
+                return
+            yield chunk
+    elif hasattr(stream, "__aiter__"):
+        async for chunk in stream:
+            yield chunk
+    else:
+        raise TypeError(f"Cannot read asynchronously from {stream!r}.")
+
+
+async def aiter_line_batches(stream, encoding="utf-8", read_size=DEFAULT_READ_SIZE):
+    """
+    Yields lists of the complete lines in each chunk read from an asynchronous stream.
+
+    Chunks of bytes are decoded incrementally so that multi-byte characters can be split between chunks.
+    Lines are split at '\\n' and any '\\r' is left for the tokenizer to strip.
+    """
+    decoder = None
+    remainder = ""
+    async for chunk in aiter_chunks(stream, read_size):
+        if isinstance(chunk, bytes):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(encoding)()
+            chunk = decoder.decode(chunk)
+
+        lines = (remainder + chunk).split("\n")
+        remainder = lines.pop()
+        if lines:
+            yield lines
+
+    if decoder is not None:
+        remainder += decoder.decode(b"", final=True)
+    if remainder:
+        yield [remainder]
+
+
+async def aiter_records(stream, encoding="utf-8", codes=None, read_size=DEFAULT_READ_SIZE, diagnostics=None):
+    """
+    Yields the NBIBRecord for each record in an asynchronous stream.
+
+    Control is given back to the event loop after each record.
+    Problems in the input are reported to `diagnostics` if it is given (see ``LineTokenizer``).
+    """
+    # asyncio is imported here so that it isn't imported when the plugin is loaded for synchronous parsing
+    import asyncio
+
+    tokenizer = LineTokenizer(codes, diagnostics)
+    async for lines in aiter_line_batches(stream, encoding, read_size):
+        for record in tokenizer.feed(lines):
+            yield record
+            await asyncio.sleep(0)
+
+    for record in tokenizer.close():
+        yield record
+
+
+async def aiter_entries(stream, executor=None, **parser_options):
+    """
+    Yields a (key, Entry) pair for each record in an asynchronous stream.
+
+    This creates an NBIBParser with `parser_options` and calls its ``aiter_entries`` method.
+    """
+    from .parsers import NBIBParser
+
+    async for key, entry in NBIBParser(**parser_options).aiter_entries(stream, executor=executor):
+        yield key, entry
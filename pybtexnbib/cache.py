@@ -0,0 +1,174 @@
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+
+CACHE_DIR_ENVIRONMENT_VARIABLE = "PYBTEXNBIB_CACHE_DIR"
+CACHE_SIZE_ENVIRONMENT_VARIABLE = "PYBTEXNBIB_CACHE_SIZE"
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+CACHE_SUFFIX = ".pickle"
+# Changed when the format of the cached files changes
+CACHE_FORMAT = 2
+
+_default_cache = None
+
+
+def package_version():
+    """ Returns the installed version of pybtexnbib or None if it isn't installed (or Python is too old to tell). """
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:
+        return None
+    try:
+        return version("pybtexnbib")
+    except PackageNotFoundError:
+        return None
+
+
+@dataclass
+class CacheStatistics:
+    """ Counts of how the parse cache has been used. """
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class NBIBCache:
+    """
+    An on-disk cache of parsed NBIB files.
+
+    The parsed entries of each file (and the problems found in it) are pickled into the cache directory under a key
+    made from the absolute path of the file, its size and modification time (or a hash of its content),
+    the options of the parser and the version of pybtexnbib, so files cached by other versions are not loaded.
+    When the cache grows beyond `max_size` bytes, the least recently used files are removed.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE, hash_content=False):
+        """
+        Args:
+            directory (str|Path): The directory to store the cache in. It is created if it doesn't exist.
+            max_size (int): The maximum total size of the cache in bytes.
+            hash_content (bool): Whether to key files on a hash of their content rather than their size
+                and modification time. This is slower but detects changes which preserve the modification time.
+        """
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.hash_content = hash_content
+        self.statistics = CacheStatistics()
+        self.version = f"{CACHE_FORMAT}:{package_version()}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def key(self, path, parser):
+        """ Returns the cache key for a file parsed with a parser. """
+        import hashlib
+
+        path = Path(path).resolve()
+        hasher = hashlib.sha256()
+        hasher.update(self.version.encode("utf-8"))
+        hasher.update(str(path).encode("utf-8"))
+        hasher.update(repr(parser.options_signature()).encode("utf-8"))
+        if self.hash_content:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    hasher.update(block)
+        else:
+            stat = path.stat()
+            hasher.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+        return hasher.hexdigest()
+
+    def cache_path(self, key):
+        return self.directory / f"{key}{CACHE_SUFFIX}"
+
+    def load(self, key):
+        """
+        Returns the list of (key, Entry) pairs and the Diagnostics (or None) cached for a file,
+        or None if the file is not in the cache.
+
+        Args:
+            key (str): The cache key of the file from ``key``.
+        """
+        import pickle
+
+        cache_path = self.cache_path(key)
+        try:
+            with open(cache_path, "rb") as f:
+                entries, diagnostics = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError):
+            self.statistics.misses += 1
+            return None
+
+        # Update the modification time so that the least recently used files are evicted first
+        try:
+            os.utime(cache_path)
+        except OSError:
+            # The file was evicted by another process after it was read
+            pass
+        self.statistics.hits += 1
+        return entries, diagnostics
+
+    def store(self, key, entries, diagnostics=None):
+        """
+        Stores the list of (key, Entry) pairs for a file and evicts old files if the cache is too large.
+
+        The problems found in the file are stored with them so that they are reported again when the file is loaded.
+
+        Args:
+            key (str): The cache key of the file from ``key``. It is made before the file is parsed
+                so that a file which changes while it is parsed is parsed again next time.
+        """
+        import pickle
+
+        cache_path = self.cache_path(key)
+        with tempfile.NamedTemporaryFile(dir=self.directory, suffix=".tmp", delete=False) as f:
+            pickle.dump((entries, diagnostics), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f.name, cache_path)
+        self.statistics.stores += 1
+        self.evict()
+
+    def size(self):
+        """ The total size of the cached files in bytes. """
+        return sum(path.stat().st_size for path in self.directory.glob(f"*{CACHE_SUFFIX}"))
+
+    def evict(self):
+        """ Removes the least recently used files until the cache is no larger than `max_size`. """
+        cached = []
+        for path in self.directory.glob(f"*{CACHE_SUFFIX}"):
+            stat = path.stat()
+            cached.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in cached)
+        for _, size, path in sorted(cached, key=lambda item: item[0]):
+            if total_size <= self.max_size:
+                break
+            path.unlink()
+            total_size -= size
+            self.statistics.evictions += 1
+
+    def clear(self):
+        """ Removes all files from the cache. """
+        for path in self.directory.glob(f"*{CACHE_SUFFIX}"):
+            path.unlink()
+
+
+def get_default_cache():
+    """
+    Returns the cache set by the PYBTEXNBIB_CACHE_DIR environment variable or None if it isn't set.
+
+    The maximum size in bytes can be set with the PYBTEXNBIB_CACHE_SIZE environment variable.
+    """
+    global _default_cache
+    directory = os.environ.get(CACHE_DIR_ENVIRONMENT_VARIABLE)
+    if not directory:
+        return None
+
+    if _default_cache is None or _default_cache.directory != Path(directory):
+        max_size = int(os.environ.get(CACHE_SIZE_ENVIRONMENT_VARIABLE, DEFAULT_MAX_SIZE))
+        _default_cache = NBIBCache(directory, max_size=max_size)
+    return _default_cache
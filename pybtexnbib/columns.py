@@ -0,0 +1,227 @@
+"""
+Columns of parsed NBIB records for analytics, built by ``NBIBParser.parse_table`` without an Entry for each record.
+
+The fields are built with the same mapping as the fields of the entries and each of them is kept in a list.
+The PMIDs and years are kept in typed arrays (with -1 where they are missing) and the values of codes which
+are repeated in a record (such as 'FAU', 'MH' and 'OT') are kept in one list with the offsets of each record,
+like the list arrays of Apache Arrow. So the table can be loaded into NumPy or pandas in bulk rather than row by row.
+NumPy and pandas are optional and are only imported to convert the table.
+"""
+from array import array
+
+from .entries import YEAR_REGEX, get_doi, get_entry_type, group_fields
+from .mapping import PUBLICATION_TYPE_CODE, default_mapping
+
+
+PMID = "PMID"
+YEAR = "year"
+ENTRY_TYPE = "entry_type"
+DOI = "doi"
+DATE = "date"
+DEFAULT_MULTI_VALUED_CODES = ("FAU", "MH", "OT")
+# The value in the typed arrays of PMIDs and years which are missing or not numbers
+MISSING = -1
+
+
+def import_optional(module_name, feature):
+    """ Imports an optional dependency or raises an ImportError saying how to install it. """
+    import importlib
+
+    try:
+        return importlib.import_module(module_name)
+    except ImportError as error:
+        raise ImportError(
+            f"{module_name} is needed for {feature}. Install it with 'pip install {module_name}'."
+        ) from error
+
+
+def to_integer(value):
+    return int(value) if value.isascii() and value.isdigit() else MISSING
+
+
+class MultiValuedColumn:
+    """
+    The values of an NBIB code for each row of a table, kept in one list with the offset of the values of each row.
+
+    The values of row ``i`` are ``values[offsets[i]:offsets[i + 1]]``.
+    """
+
+    def __init__(self):
+        self.offsets = array("q", [0])
+        self.values = []
+
+    def append(self, values):
+        self.values.extend(values)
+        self.offsets.append(len(self.values))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row):
+        return self.values[self.offsets[row]:self.offsets[row + 1]]
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def to_numpy(self):
+        """ Returns the offsets as an int64 array and the values as an object array. """
+        np = import_optional("numpy", "MultiValuedColumn.to_numpy")
+        return np.frombuffer(self.offsets, dtype=np.int64).copy(), np.array(self.values, dtype=object)
+
+
+class NBIBTable:
+    """
+    Parsed NBIB records as columns.
+
+    The columns are 'PMID', 'year', 'entry_type' (the BibTeX entry type), 'type' (the publication types), 'doi'
+    and the BibTeX fields from the mapping. 'date' is always included because the years are read from it.
+    Missing values are None in the lists of strings and -1 in the typed arrays of PMIDs and years.
+
+    Attributes:
+        columns (dict): The list or typed array of each column by name.
+        multi_valued (dict): The MultiValuedColumn of each multi-valued NBIB code.
+    """
+
+    def __init__(self, fields=None, multi_valued_codes=DEFAULT_MULTI_VALUED_CODES, mapping=None, record_filter=None):
+        """
+        Args:
+            fields (list, optional): The BibTeX fields in the mapping to make columns for. Defaults to all of them.
+            multi_valued_codes (list): The NBIB codes with values which are kept as lists.
+            mapping (NBIBMapping, optional): The mapping of NBIB codes to BibTeX fields.
+                Defaults to the default mapping.
+            record_filter (callable, optional): Called with the values of each record grouped by code.
+                Only records for which it returns True are added.
+        """
+        self.mapping = mapping or default_mapping()
+        self.record_filter = record_filter
+        mapped_fields = [bibtex_field for _, bibtex_field, _ in self.mapping.fields]
+        if fields is None:
+            fields = mapped_fields
+        unknown = [field for field in fields if field not in mapped_fields]
+        if unknown:
+            raise ValueError(f"The fields {', '.join(unknown)} are not in the mapping.")
+        if DATE in mapped_fields and DATE not in fields:
+            fields = [*fields, DATE]
+        self.fields = tuple(dict.fromkeys(fields))
+
+        # The NBIB code, index in self.fields and delimiter of each field in the mapping which has a column
+        self.plan = tuple(
+            (code, self.fields.index(bibtex_field), delimiter)
+            for code, bibtex_field, delimiter in self.mapping.fields
+            if bibtex_field in self.fields
+        )
+        self.date_index = self.fields.index(DATE) if DATE in self.fields else None
+
+        self.columns = {PMID: array("q"), YEAR: array("q"), ENTRY_TYPE: [], "type": [], DOI: []}
+        repeated = [field for field in self.fields if field in self.columns]
+        if repeated:
+            raise ValueError(f"The fields {', '.join(repeated)} have the same names as columns of the table.")
+        self.field_columns = [self.columns.setdefault(field, []) for field in self.fields]
+        self.multi_valued = {code: MultiValuedColumn() for code in multi_valued_codes}
+
+    @property
+    def codes(self):
+        """ The NBIB codes which are read to build the columns. """
+        return frozenset(
+            [PMID, PUBLICATION_TYPE_CODE, "AID", *(code for code, _, _ in self.plan), *self.multi_valued]
+        )
+
+    def __len__(self):
+        return len(self.columns[PMID])
+
+    def add_records(self, records):
+        """ Adds a row for each NBIBRecord (e.g. from ``NBIBParser.iter_records``) accepted by the record filter. """
+        for record in records:
+            self.add_record(record)
+
+    def add_record(self, record):
+        """ Adds a row for a record. Returns False if the record is rejected by the record filter. """
+        nbib_dict = group_fields(record)
+        if self.record_filter is not None and not self.record_filter(nbib_dict):
+            return False
+
+        values = [None] * len(self.fields)
+        for code, index, delimiter in self.plan:
+            code_values = nbib_dict.get(code)
+            if not code_values:
+                continue
+            value = delimiter.join(code_values)
+            values[index] = value if values[index] is None else f"{values[index]}{delimiter}{value}"
+        for column, value in zip(self.field_columns, values):
+            column.append(value)
+
+        pmids = nbib_dict.get(PMID)
+        self.columns[PMID].append(to_integer(pmids[0].strip()) if pmids else MISSING)
+        date = values[self.date_index] if self.date_index is not None else None
+        match = YEAR_REGEX.match(date) if date else None
+        self.columns[YEAR].append(int(match.group(1)) if match else MISSING)
+
+        bibtex_type, publication_description = get_entry_type(nbib_dict, self.mapping)
+        self.columns[ENTRY_TYPE].append(bibtex_type)
+        self.columns["type"].append(publication_description or None)
+        self.columns[DOI].append(get_doi(nbib_dict) or None)
+
+        for code, column in self.multi_valued.items():
+            column.append(nbib_dict.get(code, ()))
+        return True
+
+    def row(self, index):
+        """ Returns the values of a row as a dict, with lists for the multi-valued codes. """
+        row = {name: column[index] for name, column in self.columns.items()}
+        row.update((code, column[index]) for code, column in self.multi_valued.items())
+        return row
+
+    def to_numpy(self):
+        """
+        Returns a dict of NumPy arrays for the columns.
+
+        PMIDs and years are int64 arrays (with -1 where they are missing) and the other columns are object arrays.
+        Each multi-valued code gives two arrays: the offsets ('FAU_offsets') and the values ('FAU').
+        """
+        np = import_optional("numpy", "NBIBTable.to_numpy")
+        arrays = {}
+        for name, column in self.columns.items():
+            if isinstance(column, array):
+                arrays[name] = np.frombuffer(column, dtype=np.int64).copy()
+            else:
+                arrays[name] = np.array(column, dtype=object)
+        for code, column in self.multi_valued.items():
+            arrays[f"{code}_offsets"], arrays[code] = column.to_numpy()
+        return arrays
+
+    def to_pandas(self):
+        """
+        Returns a pandas DataFrame with a row for each record.
+
+        PMIDs and years are nullable 'Int64' columns.
+        The multi-valued codes are not included, see ``multi_valued_frame``.
+        """
+        np = import_optional("numpy", "NBIBTable.to_pandas")
+        pd = import_optional("pandas", "NBIBTable.to_pandas")
+        data = {}
+        for name, column in self.columns.items():
+            if isinstance(column, array):
+                values = np.frombuffer(column, dtype=np.int64).copy()
+                data[name] = pd.arrays.IntegerArray(values, values == MISSING)
+            else:
+                data[name] = np.array(column, dtype=object)
+        return pd.DataFrame(data)
+
+    def multi_valued_frame(self, code):
+        """
+        Returns a pandas DataFrame with a row for each value of a multi-valued code.
+
+        The 'row' column is the index of the record in ``to_pandas()`` and the 'PMID' column is its PMID,
+        so the frame can be joined to the records, e.g. to count the MeSH headings by year.
+        """
+        np = import_optional("numpy", "NBIBTable.multi_valued_frame")
+        pd = import_optional("pandas", "NBIBTable.multi_valued_frame")
+        offsets, values = self.multi_valued[code].to_numpy()
+        rows = np.repeat(np.arange(len(self), dtype=np.int64), np.diff(offsets))
+        pmids = np.frombuffer(self.columns[PMID], dtype=np.int64)[rows]
+        return pd.DataFrame({
+            "row": rows,
+            PMID: pd.arrays.IntegerArray(pmids, pmids == MISSING),
+            code: values,
+        })
@@ -0,0 +1,122 @@
+"""
+Deduplication of entries by PMID and DOI for ``NBIBParser(deduplicate=...)``.
+
+Overlapping PubMed searches often return the same article. A Deduplicator keeps hash indexes from PMIDs
+and normalized DOIs to the keys of the entries already added, so each entry is checked in constant time
+and no pairwise comparisons are needed.
+"""
+from .entries import normalize_doi
+
+
+KEEP_FIRST = "keep-first"
+KEEP_LATEST = "keep-latest"
+UNION = "union"
+POLICIES = (KEEP_FIRST, KEEP_LATEST, UNION)
+
+# The codes with the date a record was last revised, in order of preference, for the 'keep-latest' policy
+REVISION_CODES = ("LR", "DRDT")
+
+
+def get_revision(entry):
+    """ Returns the 'LR' or 'DRDT' revision date of an entry (e.g. '20190404') or an empty string if it has neither. """
+    fields = entry.fields
+    for code in REVISION_CODES:
+        value = fields.get(code)
+        if value:
+            return value.strip()
+    return ""
+
+
+def merge_union(existing, duplicate):
+    """ Adds the fields and persons of a duplicate entry which are missing from an existing entry. """
+    fields = existing.fields
+    for name, value in duplicate.fields.items():
+        if name not in fields:
+            fields[name] = value
+    persons = existing.persons
+    for role, people in duplicate.persons.items():
+        if role not in persons:
+            persons[role] = people
+    return existing
+
+
+class Deduplicator:
+    """
+    Merges entries which have the same PMID or DOI as an entry which has already been added.
+
+    The policy decides which entry is kept:
+        'keep-first': the entry which was added first (the default).
+        'keep-latest': the entry with the latest revision date in its 'LR' (or 'DRDT') field. Ties keep the first entry.
+        'union': the first entry with any fields and persons from the duplicates that it is missing.
+        A callable: called with the existing entry and the duplicate and returns the entry to keep.
+
+    The kept entry always stays under the key and at the position of the first entry.
+    """
+
+    # The NBIB codes read to find and merge duplicates
+    codes = ("PMID", "AID", *REVISION_CODES)
+
+    def __init__(self, policy=KEEP_FIRST):
+        if not callable(policy) and policy not in POLICIES:
+            raise ValueError(
+                f"Unknown deduplication policy {policy!r}. Use one of {', '.join(POLICIES)} or a callable."
+            )
+        self.policy = policy
+        self.pmids = {}
+        self.dois = {}
+        self.duplicates = 0
+
+    def identifiers(self, entry):
+        """ Returns the PMID and the normalized DOI of an entry (either can be None). """
+        fields = entry.fields
+        pmid = fields.get("PMID", "").strip()
+        doi = normalize_doi(fields.get("doi", ""))
+        return pmid or None, doi or None
+
+    def add_entry(self, data, key, entry, make_key=None):
+        """
+        Adds an entry to a BibliographyData object unless it is a duplicate, in which case it is merged.
+
+        If `make_key` is given, it is called with the key (e.g. to make it unique) only when the entry is added.
+        """
+        pmid, doi = self.identifiers(entry)
+        existing_key = self.pmids.get(pmid) if pmid else None
+        if existing_key is None and doi:
+            existing_key = self.dois.get(doi)
+
+        if existing_key is None or existing_key not in data.entries:
+            if make_key is not None:
+                key = make_key(key)
+            data.add_entry(key, entry)
+            # The entry is not added if it is unwanted or its key is repeated in lenient mode
+            if data.entries.get(key) is not entry:
+                return
+            existing_key = entry.key
+        else:
+            self.duplicates += 1
+            self.merge(data, existing_key, entry)
+
+        if pmid:
+            self.pmids.setdefault(pmid, existing_key)
+        if doi:
+            self.dois.setdefault(doi, existing_key)
+
+    def add_entries(self, data, entries):
+        """ Adds (key, Entry) pairs to a BibliographyData object, merging duplicates. """
+        for key, entry in entries:
+            self.add_entry(data, key, entry)
+
+    def merge(self, data, existing_key, duplicate):
+        existing = data.entries[existing_key]
+        if self.policy == KEEP_FIRST:
+            return
+        if self.policy == UNION:
+            kept = merge_union(existing, duplicate)
+        elif self.policy == KEEP_LATEST:
+            kept = duplicate if get_revision(duplicate) > get_revision(existing) else existing
+        else:
+            kept = self.policy(existing, duplicate)
+
+        if kept is not existing:
+            kept.key = existing_key
+            data.entries[existing_key] = kept
@@ -0,0 +1,157 @@
+"""
+Collecting problems found in malformed NBIB input.
+
+The tokenizers report each problem to a ``Diagnostics`` object rather than warning about it.
+In 'lenient' mode the problems are counted by category and the first of them are kept,
+in 'silent' mode they are only counted and in 'strict' mode each one is also passed to an error handler
+which is pybtex's ``report_error`` by default, so it is raised unless pybtex's strict mode is turned off.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from pybtex.exceptions import PybtexError
+
+
+STRICT = "strict"
+LENIENT = "lenient"
+SILENT = "silent"
+MODES = (STRICT, LENIENT, SILENT)
+
+# A line with text before the first tag of a record
+INVALID_LINE = "invalid-line"
+
+
+@dataclass
+class Diagnostic:
+    """ A problem in NBIB input. Line numbers start from 1 and record indexes from 0. """
+    category: str
+    reason: str
+    line_number: Optional[int] = None
+    record_index: Optional[int] = None
+    text: Optional[str] = None
+    filename: Optional[str] = None
+
+    @property
+    def message(self):
+        """ The reason with the line number, if it is known. """
+        if self.line_number is None:
+            return self.reason
+        return f"line {self.line_number}: {self.reason}"
+
+    def __str__(self):
+        return f"{self.filename}: {self.message}" if self.filename else self.message
+
+
+class NBIBSyntaxError(PybtexError):
+    """ The error passed to the error handler for a problem in NBIB input in strict mode. """
+
+    def __init__(self, diagnostic):
+        super().__init__(diagnostic.message, filename=diagnostic.filename)
+        self.diagnostic = diagnostic
+
+
+def report_error(error):
+    # Imported when it is called so that strict mode and pybtex.errors.capture() are looked up at that time
+    from pybtex.errors import report_error
+
+    report_error(error)
+
+
+class Diagnostics:
+    """
+    Collects the problems found in NBIB input.
+
+    Reporting a problem only increments a counter (and appends to a list until it is full),
+    so dirty exports are parsed as quickly as clean ones.
+    """
+
+    def __init__(self, mode=LENIENT, max_diagnostics=1000, handle_error=None):
+        """
+        Args:
+            mode (str): 'strict', 'lenient' or 'silent'.
+            max_diagnostics (int): The number of problems kept in ``self.diagnostics``. Later problems are only counted.
+            handle_error (callable, optional): Called with an NBIBSyntaxError for each problem in strict mode.
+                Defaults to pybtex's ``report_error``.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown diagnostics mode '{mode}'. Use one of: {', '.join(MODES)}.")
+        self.mode = mode
+        self.max_diagnostics = max_diagnostics
+        self.handle_error = handle_error or report_error
+        # The file being parsed, which is given to each diagnostic
+        self.filename = None
+        self.counts = {}
+        self.diagnostics = []
+
+    def __repr__(self):
+        return f"Diagnostics(mode={self.mode!r}, counts={self.counts!r})"
+
+    def __getstate__(self):
+        # The error handler isn't sent from worker processes. It is replaced by pybtex's when unpickled.
+        state = self.__dict__.copy()
+        del state["handle_error"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.handle_error = report_error
+
+    def __bool__(self):
+        return bool(self.counts)
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    @property
+    def dropped(self):
+        """ The number of problems which were counted but not kept. """
+        return self.total - len(self.diagnostics)
+
+    def report(self, category, reason, line_number=None, record_index=None, text=None):
+        """ Records a problem in the input. """
+        self.counts[category] = self.counts.get(category, 0) + 1
+        if self.mode == SILENT:
+            return
+
+        diagnostic = Diagnostic(category, reason, line_number, record_index, text, self.filename)
+        self.add(diagnostic)
+
+    def add(self, diagnostic):
+        if len(self.diagnostics) < self.max_diagnostics:
+            self.diagnostics.append(diagnostic)
+        if self.mode == STRICT:
+            self.handle_error(NBIBSyntaxError(diagnostic))
+
+    def extend(self, other, line_offset=0, record_offset=0):
+        """
+        Adds the problems collected by another Diagnostics object, e.g. in a worker process.
+
+        The offsets are added to the line numbers and record indexes of its diagnostics.
+        In strict mode each of them is passed to the error handler.
+        """
+        for category, count in other.counts.items():
+            self.counts[category] = self.counts.get(category, 0) + count
+        if self.mode == SILENT:
+            return
+
+        for diagnostic in other.diagnostics:
+            if line_offset and diagnostic.line_number is not None:
+                diagnostic.line_number += line_offset
+            if record_offset and diagnostic.record_index is not None:
+                diagnostic.record_index += record_offset
+            self.add(diagnostic)
+
+    def clear(self):
+        self.counts.clear()
+        self.diagnostics.clear()
+
+    def summary(self):
+        """ Returns the number of problems in each category and the problems which were kept as text. """
+        if not self.counts:
+            return "No problems found."
+        lines = [f"{count} {category}" for category, count in sorted(self.counts.items())]
+        lines.extend(f"  {diagnostic}" for diagnostic in self.diagnostics)
+        if self.dropped:
+            lines.append(f"  ... and {self.dropped} more")
+        return "\n".join(lines)
@@ -0,0 +1,194 @@
+import re
+from collections import defaultdict
+from pybtex.database import Entry
+from pybtex.utils import OrderedCaseInsensitiveDict
+
+from .mapping import DEFAULT_DELIMITER, PUBLICATION_TYPE_CODE
+
+
+YEAR_REGEX = re.compile(r"^(\d{4})($|\D)")
+DOI_MARKER = "[doi]"
+
+
+def normalize_doi(doi):
+    """ Normalizes a DOI for lookups. DOIs are case insensitive. """
+    return doi.replace(DOI_MARKER, "").strip().lower()
+
+
+def get_doi(nbib_dict):
+    """ Returns the DOI of a record from its 'AID' codes (the last one marked '[doi]') or an empty string. """
+    doi = ""
+    for value in nbib_dict.get("AID", ()):
+        if DOI_MARKER in value:
+            doi = value.replace(DOI_MARKER, "").strip()
+    return doi
+
+
+def group_fields(record):
+    """ Groups the values of an NBIBRecord by their code, keeping the order of the codes. """
+    nbib_dict = defaultdict(list)
+    for code, value in record:
+        nbib_dict[code].append(value)
+    return nbib_dict
+
+
+def get_entry_type(nbib_dict, mapping):
+    """
+    Finds the BibTeX entry type of a record from its publication types.
+
+    Returns:
+        tuple: The BibTeX entry type and the description of the publication types for the 'type' field.
+    """
+    nbib_type_to_bibtex = mapping.types
+    nbib_publication_types = nbib_dict.get(PUBLICATION_TYPE_CODE, ())
+    bibtex_types = {
+        nbib_type_to_bibtex[nbib_type] for nbib_type in nbib_publication_types if nbib_type in nbib_type_to_bibtex
+    }
+    bibtex_type = bibtex_types.pop() if len(bibtex_types) == 1 else "misc"
+    return bibtex_type, "; ".join(nbib_publication_types)
+
+
+def build_persons(nbib_dict, mapping, person_cache, first_only=False):
+    """
+    Builds the persons of an entry from the values of a record grouped by code.
+
+    Args:
+        first_only (bool): Whether to stop after the first person, e.g. to build an entry key.
+
+    Returns:
+        OrderedCaseInsensitiveDict: Lists of Person objects by role.
+    """
+    persons = OrderedCaseInsensitiveDict()
+    person = person_cache.person
+    for code, role in mapping.persons:
+        names = nbib_dict.get(code)
+        if not names:
+            continue
+        if first_only:
+            persons[role] = [person(names[0])]
+            break
+        persons.setdefault(role, []).extend(person(name) for name in names)
+    return persons
+
+
+def build_fields(nbib_dict, mapping, publication_description="", bibtex_fields=None):
+    """
+    Builds the fields of an entry from the values of a record grouped by code.
+
+    Codes in the mapping are joined into their BibTeX fields, the year is read from the date if possible,
+    the DOI is read from the 'AID' codes and all other codes are kept in fields named after the code.
+
+    Args:
+        publication_description (str): The value of the 'type' field.
+        bibtex_fields (set, optional): If given, only the BibTeX fields in the mapping with these names are built.
+
+    Returns:
+        OrderedCaseInsensitiveDict: The fields of the entry.
+    """
+    fields = OrderedCaseInsensitiveDict()
+    if publication_description and bibtex_fields is None:
+        fields["type"] = publication_description
+
+    for code, bibtex_field, delimiter in mapping.fields:
+        values = nbib_dict.get(code)
+        if not values or (bibtex_fields is not None and bibtex_field not in bibtex_fields):
+            continue
+        value = delimiter.join(values)
+        if bibtex_field in fields:
+            fields[bibtex_field] += f"{delimiter}{value}"
+        else:
+            fields[bibtex_field] = value
+
+    # Read year from date field if possible
+    if "date" in fields:
+        m = YEAR_REGEX.match(fields['date'])
+        if m:
+            fields['year'] = m.group(1)
+
+    if bibtex_fields is not None:
+        return fields
+
+    # Get DOI
+    other_article_ids = []
+    for value in nbib_dict.get("AID", ()):
+        if DOI_MARKER in value:
+            fields["doi"] = value.replace(DOI_MARKER, "").strip()
+        else:
+            other_article_ids.append(value)
+
+    # Add the remaining fields with the code as the field name
+    mapped_codes = mapping.mapped_codes
+    for code, values in nbib_dict.items():
+        if code not in mapped_codes and code != "AID":
+            fields[code] = DEFAULT_DELIMITER.join(values)
+    if other_article_ids:
+        fields["AID"] = DEFAULT_DELIMITER.join(other_article_ids)
+
+    return fields
+
+
+class LazyEntry(Entry):
+    """
+    An Entry which keeps the values of an NBIB record and only builds its fields and persons when they are first used.
+
+    The fields and the persons are built independently, so reading fields never parses any names.
+    Once both have been built, the values of the record are released.
+    """
+
+    def __init__(self, type_, nbib_dict, mapping, person_cache, publication_description=""):
+        self.type = type_.lower()
+        self.original_type = type_
+        self._nbib_dict = nbib_dict
+        self._mapping = mapping
+        self._person_cache = person_cache
+        self._publication_description = publication_description
+        self._fields = None
+        self._persons = None
+
+    def _release_record(self):
+        if self._fields is not None and self._persons is not None:
+            self._nbib_dict = None
+
+    @property
+    def is_materialized(self):
+        """ Whether both the fields and the persons have been built. """
+        return self._nbib_dict is None
+
+    @property
+    def fields(self):
+        if self._fields is None:
+            self._fields = build_fields(self._nbib_dict, self._mapping, self._publication_description)
+            self._release_record()
+        return self._fields
+
+    @fields.setter
+    def fields(self, value):
+        self._fields = OrderedCaseInsensitiveDict(value)
+        self._release_record()
+
+    @property
+    def persons(self):
+        if self._persons is None:
+            self._persons = build_persons(self._nbib_dict, self._mapping, self._person_cache)
+            self._release_record()
+        return self._persons
+
+    @persons.setter
+    def persons(self, value):
+        self._persons = OrderedCaseInsensitiveDict(value)
+        self._release_record()
+
+    def key_entry(self):
+        """
+        Returns a plain Entry with only what is needed to build an entry key: the first person, the title and the year.
+        """
+        if self._nbib_dict is None:
+            return self
+        return Entry(
+            self.original_type,
+            fields=self._fields or build_fields(self._nbib_dict, self._mapping, bibtex_fields={"title", "date"}),
+            persons=self._persons or build_persons(self._nbib_dict, self._mapping, self._person_cache, first_only=True),
+        )
+
+    def lower(self):
+        return Entry(self.type, fields=self.fields.lower(), persons=self.persons.lower())
@@ -0,0 +1,141 @@
+"""
+Predicates for ``NBIBParser(record_filter=...)``.
+
+A predicate is called with the values of a record grouped by NBIB code (a dict of lists)
+before any Entry or Person objects are built, so rejected records cost very little.
+These predicates are dataclasses so that they can be sent to worker processes and used in cache keys
+(unlike other callables, which are not cached, see ``is_cacheable``).
+The NBIB codes each of them reads are in its ``codes`` attribute,
+so they are read even when the parser is given ``codes``.
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from .entries import YEAR_REGEX
+
+
+def _sorted_strings(values):
+    return tuple(sorted(str(value) for value in values))
+
+
+def _predicate_codes(predicates):
+    # The codes read by all of the predicates, or None if any of them doesn't say which codes it reads
+    codes = []
+    for predicate in predicates:
+        predicate_codes = getattr(predicate, "codes", None)
+        if predicate_codes is None:
+            return None
+        codes.extend(predicate_codes)
+    return tuple(dict.fromkeys(codes))
+
+
+@dataclass(frozen=True)
+class YearRange:
+    """ Accepts records with a year in the 'DP' code between `start` and `end` inclusive. """
+    start: Optional[int] = None
+    end: Optional[int] = None
+
+    codes = ("DP",)
+
+    def __call__(self, nbib_dict):
+        for date in nbib_dict.get("DP", ()):
+            m = YEAR_REGEX.match(date)
+            if m:
+                year = int(m.group(1))
+                return (self.start is None or year >= self.start) and (self.end is None or year <= self.end)
+        return False
+
+
+@dataclass(frozen=True)
+class PublicationType:
+    """ Accepts records with any of the given publication types in the 'PT' code, e.g. "Journal Article". """
+    types: Tuple[str, ...]
+
+    codes = ("PT",)
+
+    def __init__(self, *types):
+        object.__setattr__(self, "types", _sorted_strings(types))
+
+    def __call__(self, nbib_dict):
+        return any(publication_type in self.types for publication_type in nbib_dict.get("PT", ()))
+
+
+@dataclass(frozen=True)
+class Language:
+    """ Accepts records with any of the given languages in the 'LA' code, e.g. "eng". """
+    languages: Tuple[str, ...]
+
+    codes = ("LA",)
+
+    def __init__(self, *languages):
+        object.__setattr__(self, "languages", _sorted_strings(language.lower() for language in languages))
+
+    def __call__(self, nbib_dict):
+        return any(language.lower() in self.languages for language in nbib_dict.get("LA", ()))
+
+
+@dataclass(frozen=True)
+class PMIDs:
+    """ Accepts records with a PMID in a set of PMIDs. """
+    pmids: frozenset
+
+    codes = ("PMID",)
+
+    def __init__(self, pmids):
+        object.__setattr__(self, "pmids", frozenset(str(pmid) for pmid in pmids))
+
+    def __repr__(self):
+        return f"PMIDs({_sorted_strings(self.pmids)!r})"
+
+    def __call__(self, nbib_dict):
+        return any(pmid.strip() in self.pmids for pmid in nbib_dict.get("PMID", ()))
+
+
+@dataclass(frozen=True)
+class AllOf:
+    """ Accepts records which are accepted by all of the given predicates. """
+    predicates: tuple
+
+    def __init__(self, *predicates):
+        object.__setattr__(self, "predicates", tuple(predicates))
+
+    @property
+    def codes(self):
+        return _predicate_codes(self.predicates)
+
+    def __call__(self, nbib_dict):
+        return all(predicate(nbib_dict) for predicate in self.predicates)
+
+
+@dataclass(frozen=True)
+class AnyOf:
+    """ Accepts records which are accepted by any of the given predicates. """
+    predicates: tuple
+
+    def __init__(self, *predicates):
+        object.__setattr__(self, "predicates", tuple(predicates))
+
+    @property
+    def codes(self):
+        return _predicate_codes(self.predicates)
+
+    def __call__(self, nbib_dict):
+        return any(predicate(nbib_dict) for predicate in self.predicates)
+
+
+# The predicates with the same repr in every run, so that they can be used in cache keys
+PREDICATES = (YearRange, PublicationType, Language, PMIDs, AllOf, AnyOf)
+
+
+def is_cacheable(record_filter):
+    """
+    Checks whether a record filter is one of the predicates in this module (only combining predicates in this module).
+
+    Other callables (such as functions, lambdas and subclasses) can't be told apart between runs
+    so the entries parsed with them are not cached.
+    """
+    if type(record_filter) not in PREDICATES:
+        return False
+    if isinstance(record_filter, (AllOf, AnyOf)):
+        return all(is_cacheable(predicate) for predicate in record_filter.predicates)
+    return True
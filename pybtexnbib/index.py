@@ -0,0 +1,193 @@
+import json
+import mmap
+import os
+from pathlib import Path
+
+from .entries import DOI_MARKER, normalize_doi
+from .parsers import NBIBParser
+from .tokenizer import iter_record_spans, tokenize_buffer
+
+
+INDEX_VERSION = 2
+INDEX_SUFFIX = ".idx"
+
+
+def get_dois(record):
+    """
+    Returns the normalized DOIs in the 'AID' fields of an NBIBRecord.
+
+    All of them are indexed so that a record can be found by the DOI in its entry's 'doi' field (the last of them).
+    """
+    return [normalize_doi(value) for value in record.get_all("AID") if DOI_MARKER in value]
+
+
+def get_pmid(record):
+    """ Returns the PMID of an NBIBRecord or None if there isn't one. """
+    pmid = record.get("PMID")
+    return pmid.strip() if pmid is not None else None
+
+
+class NBIBIndex:
+    """
+    A sidecar index for random access to the records of an NBIB file by PMID, DOI or record number.
+
+    The index stores the byte offset and length of each record and is saved beside the NBIB file
+    (e.g. ``export.nbib.idx``). It records the size and modification time of the NBIB file
+    and is rebuilt automatically if the file has changed.
+    If the sidecar file cannot be written then the index is only kept in memory.
+
+    Example:
+        >>> index = NBIBIndex("export.nbib")
+        >>> entry = index.get("20301770")
+    """
+
+    def __init__(self, path, index_path=None, parser=None):
+        """
+        Args:
+            path (str|Path): The path to the NBIB file.
+            index_path (str|Path, optional): The path to the sidecar index.
+                Defaults to the NBIB path with '.idx' appended.
+            parser (NBIBParser, optional): The parser used to build entries. Defaults to a new NBIBParser.
+        """
+        self.path = Path(path)
+        self.index_path = Path(index_path) if index_path else self.path.with_name(self.path.name + INDEX_SUFFIX)
+        self.parser = parser or NBIBParser()
+        self.offsets = []
+        self.lengths = []
+        self.pmids = {}
+        self.dois = {}
+
+        if not self.load():
+            self.build()
+            self.save()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __contains__(self, pmid):
+        return str(pmid) in self.pmids
+
+    def file_signature(self):
+        stat = os.stat(self.path)
+        return dict(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+    def is_stale(self):
+        """ Checks whether the NBIB file has changed since the index was built. """
+        return self.file_signature() != self.signature
+
+    def load(self):
+        """ Loads the sidecar index if it is up to date with the NBIB file. Returns True if it was loaded. """
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if data.get("version") != INDEX_VERSION or data.get("signature") != self.file_signature():
+            return False
+
+        self.signature = data["signature"]
+        self.offsets = data["offsets"]
+        self.lengths = data["lengths"]
+        self.pmids = {pmid: number for number, pmid in enumerate(data["pmids"]) if pmid is not None}
+        self.dois = data["dois"]
+        return True
+
+    def build(self):
+        """ Builds the index by scanning the NBIB file. """
+        self.signature = self.file_signature()
+        self.offsets = []
+        self.lengths = []
+        self.pmids = {}
+        self.dois = {}
+        if self.signature["size"] == 0:
+            return
+
+        # Problems in the file are handled by the parser's diagnostics, as when it parses the file
+        diagnostics = self.parser.diagnostics
+        previous_filename = diagnostics.filename
+        diagnostics.filename = str(self.path)
+        try:
+            with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                spans = iter_record_spans(buffer, self.parser.encoding, diagnostics=diagnostics)
+                for number, (start, end, record) in enumerate(spans):
+                    self.offsets.append(start)
+                    self.lengths.append(end - start)
+                    pmid = get_pmid(record)
+                    if pmid and pmid not in self.pmids:
+                        self.pmids[pmid] = number
+                    for doi in get_dois(record):
+                        if doi and doi not in self.dois:
+                            self.dois[doi] = number
+        finally:
+            diagnostics.filename = previous_filename
+
+    def save(self):
+        """ Writes the index to the sidecar file. Returns True if it was written. """
+        pmids = [None] * len(self)
+        for pmid, number in self.pmids.items():
+            pmids[number] = pmid
+
+        data = dict(
+            version=INDEX_VERSION,
+            signature=self.signature,
+            offsets=self.offsets,
+            lengths=self.lengths,
+            pmids=pmids,
+            # A record can have more than one DOI
+            dois=self.dois,
+        )
+        try:
+            with open(self.index_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+        except OSError:
+            return False
+        return True
+
+    def refresh(self):
+        """ Rebuilds the index if the NBIB file has changed. """
+        if self.is_stale():
+            self.build()
+            self.save()
+
+    def span(self, number):
+        """ Returns the byte offset and length of a record from its number in the file (starting at zero). """
+        return self.offsets[number], self.lengths[number]
+
+    def get_by_number(self, number):
+        """
+        Returns the (key, Entry) pair for a record from its number in the file (starting at zero).
+
+        Returns None if the record is rejected by the record filter of the parser.
+        """
+        self.refresh()
+        return self.read_entry(number)
+
+    def read_entry(self, number):
+        """ Seeks to a record in the NBIB file and builds the (key, Entry) pair for it. """
+        offset, length = self.span(number)
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            buffer = f.read(length)
+
+        diagnostics = self.parser.diagnostics
+        record = next(tokenize_buffer(buffer, self.parser.encoding, codes=self.parser.codes, diagnostics=diagnostics))
+        return self.parser.process_entry(record)
+
+    def get(self, pmid, default=None):
+        """ Returns the Entry for a PMID or `default` if the PMID is not in the file. """
+        self.refresh()
+        number = self.pmids.get(str(pmid))
+        if number is None:
+            return default
+        result = self.read_entry(number)
+        return result[1] if result is not None else default
+
+    def get_by_doi(self, doi, default=None):
+        """ Returns the Entry for a DOI or `default` if the DOI is not in the file. """
+        self.refresh()
+        number = self.dois.get(normalize_doi(doi))
+        if number is None:
+            return default
+        result = self.read_entry(number)
+        return result[1] if result is not None else default
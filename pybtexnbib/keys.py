@@ -0,0 +1,134 @@
+"""
+Strategies for the keys of the entries built by ``NBIBParser(key_strategy=...)`` and making the keys unique.
+
+The strategies are:
+    'author-year': the surname of the first author and the year, e.g. 'Smith2020' (the default).
+    'pmid': 'pmid' followed by the PMID of the record, e.g. 'pmid20301770'.
+        These keys are the same each time a record is parsed.
+    'doi': the DOI of the record, e.g. '10.1093/bioinformatics/btab672'.
+    A callable: called with the Entry and returns its key.
+Records without a PMID or DOI fall back to the author-year key.
+"""
+import re
+
+from .entries import LazyEntry, get_doi
+
+
+AUTHOR_YEAR = "author-year"
+PMID = "pmid"
+DOI = "doi"
+STRATEGIES = (AUTHOR_YEAR, PMID, DOI)
+
+# Characters which cannot be in a BibTeX key or a LaTeX citation
+INVALID_KEY_CHARACTERS_REGEX = re.compile(r'[\s,{}%#~\\"]')
+
+
+def author_year_key(nbib_dict, entry):
+    """
+    Returns the key from the surname of the first author (or the title) and the year.
+
+    These are the keys pybtexris builds for RIS files, so NBIB and RIS files can be combined.
+    pybtexris (and csv) are imported when the first key is built rather than when the plugin is loaded.
+    """
+    from pybtexris.parsers import get_entry_key
+
+    if isinstance(entry, LazyEntry):
+        entry = entry.key_entry()
+    return get_entry_key(entry)
+
+
+def pmid_key(nbib_dict, entry):
+    """ Returns 'pmid' followed by the PMID of the record or the author-year key if it doesn't have one. """
+    pmids = nbib_dict.get("PMID")
+    pmid = pmids[0].strip() if pmids else ""
+    if not pmid:
+        return author_year_key(nbib_dict, entry)
+    from pybtexris.parsers import clean_entry_key
+
+    return clean_entry_key(f"pmid{INVALID_KEY_CHARACTERS_REGEX.sub('_', pmid)}")
+
+
+def doi_key(nbib_dict, entry):
+    """ Returns the DOI of the record (as in the 'doi' field) or the author-year key if it doesn't have one. """
+    doi = get_doi(nbib_dict)
+    if not doi:
+        return author_year_key(nbib_dict, entry)
+    from pybtexris.parsers import clean_entry_key
+
+    return clean_entry_key(INVALID_KEY_CHARACTERS_REGEX.sub("_", doi))
+
+
+KEY_FUNCTIONS = {
+    AUTHOR_YEAR: author_year_key,
+    PMID: pmid_key,
+    DOI: doi_key,
+}
+
+
+def get_key_function(strategy):
+    """ Returns a function which is given the values of a record grouped by code and its Entry and returns its key. """
+    if callable(strategy):
+        return lambda nbib_dict, entry: strategy(entry)
+    try:
+        return KEY_FUNCTIONS[strategy]
+    except KeyError:
+        raise ValueError(f"Unknown key strategy {strategy!r}. Use one of {', '.join(STRATEGIES)} or a callable.")
+
+
+def key_codes(strategy, mapping):
+    """
+    Returns the NBIB codes read to build keys with a strategy: the codes of the persons, title and date in the mapping
+    for author-year keys (which the other strategies fall back to), and 'PMID' or 'AID'.
+    The codes read by a callable are not known so none are returned for it.
+    """
+    if callable(strategy):
+        return frozenset()
+    codes = {code for code, _ in mapping.persons}
+    codes.update(code for code, bibtex_field, _ in mapping.fields if bibtex_field in ("title", "date"))
+    if strategy == PMID:
+        codes.add("PMID")
+    elif strategy == DOI:
+        codes.add("AID")
+    return frozenset(codes)
+
+
+def key_suffix(number):
+    """ Returns the suffix for the nth repeat of a key: 'a' to 'z', then 'aa', 'ab' and so on. """
+    letters = []
+    while number > 0:
+        number, remainder = divmod(number - 1, 26)
+        letters.append(chr(ord("a") + remainder))
+    return "".join(reversed(letters))
+
+
+class KeyTable:
+    """
+    Makes entry keys unique by adding 'a', 'b', ... to repeated keys, e.g. 'Smith2020', 'Smith2020a', 'Smith2020b'.
+
+    A counter is kept for each key so the next free suffix is found in constant time
+    however many entries share the key. Keys are compared case insensitively like BibTeX keys.
+    """
+
+    def __init__(self):
+        self.counts = {}
+
+    def unique_key(self, key, entries):
+        """ Returns the key, or the key with a suffix if it is in `entries` (e.g. ``BibliographyData.entries``). """
+        folded = key.lower()
+        count = self.counts.get(folded)
+        if count is None and key not in entries:
+            self.counts[folded] = 0
+            return key
+
+        count = count or 0
+        while True:
+            count += 1
+            unique_key = key + key_suffix(count)
+            # Only a key which was not made by this table can be taken already
+            if unique_key not in entries:
+                break
+        self.counts[folded] = count
+        return unique_key
+
+    def clear(self):
+        self.counts.clear()
@@ -0,0 +1,165 @@
+from functools import lru_cache
+from pathlib import Path
+
+
+data_dir = Path(__file__).parent / "data"
+# The module with the default mapping compiled from the CSV files in the data directory
+COMPILED_MAPPING_PATH = Path(__file__).parent / "mapping_data.py"
+
+DEFAULT_DELIMITER = "; "
+PUBLICATION_TYPE_CODE = "PT"
+
+
+def read_csv_rows(path):
+    """ Reads the rows of a CSV file after its header. """
+    import csv
+
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f, delimiter=',')
+
+        # skip the header
+        next(reader, None)
+        return [row for row in reader if row]
+
+
+def read_types_csv(path):
+    """ Reads a CSV file of NBIB publication types and BibTeX entry types into a dict. """
+    return {row[0]: row[1] for row in read_csv_rows(path)}
+
+
+def read_persons_csv(path):
+    """ Reads a CSV file of NBIB codes and person roles into a dict. """
+    return {row[0]: row[1] for row in read_csv_rows(path)}
+
+
+def read_fields_csv(path):
+    """ Reads a CSV file of NBIB codes, BibTeX fields and optional delimiters into a dict. """
+    return {row[0]: (row[1], row[2] if len(row) > 2 else None) for row in read_csv_rows(path)}
+
+
+class NBIBMapping:
+    """
+    The mapping from NBIB publication types and codes to BibTeX entry types, persons and fields.
+
+    The mapping is compiled into tuples once so that building each entry only needs a loop over them.
+    The default mapping is read from the CSV files in the data directory once per process (see ``default_mapping``).
+    Use ``updated`` to override or extend it.
+    """
+
+    def __init__(self, types, persons, fields):
+        """
+        Args:
+            types (dict): NBIB publication types (from 'PT') to BibTeX entry types.
+            persons (dict): NBIB codes to person roles, e.g. {"FAU": "author"}.
+            fields (dict): NBIB codes to BibTeX fields. The values can be the field name
+                or a tuple of the field name and the delimiter used to join repeated values.
+        """
+        self.types = dict(types)
+        self.persons = tuple(persons.items())
+        self.fields = tuple(
+            (
+                (code, field, DEFAULT_DELIMITER)
+                if isinstance(field, str)
+                else (code, field[0], field[1] or DEFAULT_DELIMITER)
+            )
+            for code, field in fields.items()
+        )
+        # The codes which are not kept in a field named after the code
+        self.mapped_codes = frozenset([PUBLICATION_TYPE_CODE, *persons, *fields])
+
+    @classmethod
+    def from_csv(cls, types_path=None, persons_path=None, fields_path=None):
+        """
+        Reads a mapping from CSV files in the same format as the files in the data directory.
+
+        Any path which is not given is read from the data directory.
+        """
+        return cls(
+            types=read_types_csv(types_path or data_dir / "types.csv"),
+            persons=read_persons_csv(persons_path or data_dir / "persons.csv"),
+            fields=read_fields_csv(fields_path or data_dir / "fields.csv"),
+        )
+
+    def updated(self, types=None, persons=None, fields=None):
+        """
+        Returns a new mapping with some types, persons or fields added or overridden.
+
+        Each argument can be a dict or the path to a CSV file in the same format as the files in the data directory.
+        Mapping a code to None removes it so that its values are kept in a field named after the code.
+        """
+        new_types = dict(self.types)
+        new_persons = dict(self.persons)
+        new_fields = {code: (field, delimiter) for code, field, delimiter in self.fields}
+
+        if isinstance(types, (str, Path)):
+            types = read_types_csv(types)
+        if isinstance(persons, (str, Path)):
+            persons = read_persons_csv(persons)
+        if isinstance(fields, (str, Path)):
+            fields = read_fields_csv(fields)
+
+        for current, overrides in ((new_types, types), (new_persons, persons), (new_fields, fields)):
+            for key, value in (overrides or {}).items():
+                if value is None:
+                    current.pop(key, None)
+                else:
+                    current[key] = value
+
+        return NBIBMapping(types=new_types, persons=new_persons, fields=new_fields)
+
+    def signature(self):
+        """ A hashable summary of the mapping, e.g. for cache keys. """
+        return (tuple(sorted(self.types.items())), self.persons, self.fields)
+
+    def __eq__(self, other):
+        return isinstance(other, NBIBMapping) and self.signature() == other.signature()
+
+    def __hash__(self):
+        return hash(self.signature())
+
+
+def python_literal(value):
+    """ Returns Python source for a string or a tuple of strings with double quotes, as black formats it. """
+    import json
+
+    if isinstance(value, tuple):
+        return "(" + ", ".join(python_literal(item) for item in value) + ")"
+    return json.dumps(value, ensure_ascii=False)
+
+
+def compile_mapping(path=COMPILED_MAPPING_PATH):
+    """
+    Writes the mapping from the CSV files in the data directory as a Python module.
+
+    The default mapping is loaded from this module (precompiled to bytecode when it is installed)
+    rather than by parsing the CSV files in each process.
+    Run ``python -m pybtexnbib.mapping`` after changing the CSV files.
+    """
+    types = read_types_csv(data_dir / "types.csv")
+    persons = read_persons_csv(data_dir / "persons.csv")
+    fields = read_fields_csv(data_dir / "fields.csv")
+
+    lines = [
+        (
+            '""" The default mapping compiled from the CSV files in the data directory '
+            'by ``python -m pybtexnbib.mapping``. """'
+        ),
+        "",
+    ]
+    for name, table in (("TYPES", types), ("PERSONS", persons), ("FIELDS", fields)):
+        lines.append(f"{name} = {{")
+        lines.extend(f"    {python_literal(key)}: {python_literal(value)}," for key, value in table.items())
+        lines.append("}")
+    Path(path).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+@lru_cache(maxsize=None)
+def default_mapping():
+    """ Returns the default mapping from the data directory, which is loaded only once per process. """
+    from .mapping_data import TYPES, PERSONS, FIELDS
+
+    return NBIBMapping(types=TYPES, persons=PERSONS, fields=FIELDS)
+
+
+if __name__ == "__main__":
+    compile_mapping()
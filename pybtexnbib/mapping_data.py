@@ -0,0 +1,34 @@
+""" The default mapping compiled from the CSV files in the data directory by ``python -m pybtexnbib.mapping``. """
+
+TYPES = {
+    "Journal Article": "article",
+    "Dictionary": "book",
+    "Festschrift": "book",
+    "Monograph": "book",
+    "Textbook": "book",
+    "Book Chapter": "incollection",
+    "Laboratory Manual": "manual",
+    "Congress": "proceedings",
+    "Technical Report": "techreport",
+    "Unpublished Work": "unpublished",
+}
+PERSONS = {
+    "FAU": "author",
+    "FED": "editor",
+}
+FIELDS = {
+    "TI": ("title", ""),
+    "JT": ("journal", ""),
+    "JTI": ("shortjournal", ""),
+    "DP": ("date", ""),
+    "BTI": ("booktitle", ""),
+    "PB": ("publisher", ""),
+    "CY": ("address", ""),
+    "VI": ("volume", ""),
+    "PG": ("pages", ""),
+    "OT": ("keywords", " | "),
+    "GN": ("note", " | "),
+    "ISBN": ("isbn", ""),
+    "IS": ("issn", ""),
+    "AB": ("abstract", ""),
+}
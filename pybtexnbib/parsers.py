@@ -1,21 +1,130 @@
-import re
-from dataclasses import dataclass
-from collections import defaultdict
+import importlib
+import io
+import mmap
+import os
+from collections import deque
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
+from time import perf_counter
 from pybtex.database.input import BaseParser
-from pybtex.database import Entry, Person
-import csv
-from warnings import warn
-from pybtexris.parsers import clean_entry_key, get_entry_key
+import pybtex.io
+from pybtex.database import Entry
+from pybtex.exceptions import PybtexError
+from pybtex.kpathsea import kpsewhich
+from .aio import aiter_records, DEFAULT_READ_SIZE
+from .cache import NBIBCache, get_default_cache
+from .dedup import Deduplicator
+from .diagnostics import Diagnostics, LENIENT, SILENT, report_error
+from .entries import LazyEntry, group_fields, get_entry_type, build_fields, build_persons
+from .keys import AUTHOR_YEAR, KeyTable, get_key_function, key_codes
+from .mapping import default_mapping
+from .persons import default_person_cache
+from .tokenizer import NBIBRecord, tokenize, iter_record_spans, find_record_ranges, is_ascii_compatible, count_lines
 
 
-data_dir = Path(__file__).parent/"data"
+# The modules with the functions which open compressed files by suffix. Files are decompressed as they are read.
+# The modules (like asyncio, pickle and the process pools) are only imported when they are used
+# so that loading the plugin is quick for short pybtex-convert and pybtex-format runs.
+COMPRESSION_MODULES = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".xz": "lzma",
+}
 
-@dataclass
-class NBIBField:
-    """ A field in a NBIB file. """
-    code: str
-    value: str
+# The parser used by each worker process when parsing in parallel
+_worker_parser = None
+# The pickled class and arguments of the worker parser when it is created by `_process_records_with`
+_worker_parser_key = None
+
+
+def _init_worker(parser_class, args, kwargs):
+    global _worker_parser
+    _worker_parser = parser_class(*args, **kwargs)
+
+
+def _process_records(records):
+    return list(_worker_parser.process_entries(records))
+
+
+def _process_records_with(parser_key, records):
+    # Used with executors which were not started with `_init_worker`
+    global _worker_parser_key
+    if parser_key != _worker_parser_key:
+        import pickle
+
+        _init_worker(*pickle.loads(parser_key))
+        _worker_parser_key = parser_key
+    return _process_records(records)
+
+
+def _process_file_range(path, start, end):
+    # Returns the entries, the problems found and the number of records in a range of a file
+    record_count = 0
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        _worker_parser.diagnostics.filename = path
+        spans = iter_record_spans(
+            buffer, _worker_parser.encoding, start, end, _worker_parser.codes, _worker_parser.diagnostics
+        )
+        try:
+            entries = []
+            for _, _, record in spans:
+                record_count += 1
+                result = _worker_parser.process_entry(record)
+                if result is not None:
+                    entries.append(result)
+        finally:
+            spans.close()
+    return entries, _worker_parser.take_diagnostics(), record_count
+
+
+def _parse_file_entries(path):
+    # Returns the entries and the problems found in a file
+    return list(_worker_parser.iter_entries(path)), _worker_parser.take_diagnostics()
+
+
+def get_compression_opener(path):
+    """ Returns the function which opens a compressed file (e.g. gzip.open for 'export.nbib.gz') or None. """
+    module_name = COMPRESSION_MODULES.get(os.path.splitext(str(path))[1].lower())
+    if module_name is None:
+        return None
+    return importlib.import_module(module_name).open
+
+
+def locate_file(path):
+    """
+    Returns the path of a file to read, searching for it with kpsewhich (e.g. in BIBINPUTS) if it doesn't exist.
+
+    This is how pybtex finds the files it opens, so it is done before a file is memory-mapped or decompressed.
+    """
+    path = str(path)
+    if os.path.isfile(path):
+        return path
+    try:
+        found = kpsewhich(path)
+    except OSError:
+        # kpsewhich isn't installed
+        return path
+    return os.fsdecode(found) if found else path
+
+
+def is_cacheable_filter(record_filter):
+    """ Checks whether a record filter can be in cache keys: None or a predicate from ``pybtexnbib.filters``. """
+    if record_filter is None:
+        return True
+    from .filters import is_cacheable
+
+    return is_cacheable(record_filter)
+
+
+def iter_chunks(iterable, chunk_size):
+    """ Yields lists of up to `chunk_size` consecutive items from an iterable. """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
 
 
 class NBIBParser(BaseParser):
@@ -29,129 +138,623 @@ class NBIBParser(BaseParser):
     default_suffix = '.nbib'
     unicode_io = True
 
-    def __init__(self, *args, **kwargs):
+    # The approximate number of bytes of a file sent to a worker process at a time when `workers` > 1
+    file_chunk_size = 8 * 1024 * 1024
+
+    def __init__(
+        self,
+        *args,
+        workers=1,
+        chunk_size=1000,
+        cache=None,
+        cache_token=None,
+        mapping=None,
+        person_cache=None,
+        lazy=False,
+        codes=None,
+        record_filter=None,
+        deduplicate=None,
+        stats=None,
+        diagnostics=None,
+        key_strategy=AUTHOR_YEAR,
+        unique_keys=False,
+        **kwargs,
+    ):
+        """
+        Args:
+            workers (int): The number of processes used to build entries. Defaults to 1 which parses serially.
+            chunk_size (int): The number of records sent to a worker process at a time when `workers` > 1.
+            cache (NBIBCache|str|Path, optional): A cache (or cache directory) for the entries parsed by `parse_file`.
+                Defaults to the directory in the PYBTEXNBIB_CACHE_DIR environment variable if it is set.
+                The cache isn't used if the record filter isn't a predicate from ``pybtexnbib.filters``
+                or the key strategy is a callable, because they can't be told apart between runs, unless `cache_token`
+                is given.
+            cache_token (str, optional): A token which identifies the custom record filter and key strategy
+                in the cache keys, so that entries parsed with them are cached. It must be changed
+                whenever they change.
+            mapping (NBIBMapping, optional): The mapping from NBIB types and codes to BibTeX types, persons and fields.
+                Defaults to the mapping from the CSV files in the data directory.
+            person_cache (PersonCache, optional): The cache of parsed author and editor names.
+                Defaults to a cache shared by all parsers in the process.
+            lazy (bool): Whether to create LazyEntry objects, which only build their fields and persons when used.
+            codes (set, optional): If given, only the NBIB codes in this set are read
+                (e.g. {"PMID", "TI", "DP", "FAU"}).
+                The values of all other codes are skipped by the tokenizer and never become fields.
+                The codes read by the key strategy, deduplication and the predicates in ``pybtexnbib.filters``
+                are always read.
+                Other record filters and key functions must only use codes in this set.
+            record_filter (callable, optional): A predicate called with the values of each record grouped by code
+                (a dict of lists) before its entry is built. Records for which it returns False are skipped.
+                See ``pybtexnbib.filters`` for predicates on year, publication type, language and PMID.
+                It must be picklable when `workers` > 1.
+            deduplicate (str|callable|Deduplicator, optional): If given, entries with the same PMID or DOI as an entry
+                already in ``self.data`` (including from other files) are merged rather than added.
+                The policy is 'keep-first', 'keep-latest' (by the 'LR' or 'DRDT' revision date), 'union'
+                or a callable which is given the existing entry and the duplicate and returns the entry to keep.
+                See ``pybtexnbib.dedup``. Entries from ``iter_entries`` are not deduplicated.
+            stats (ParseStatistics|bool, optional): If given (or True), the time of each stage of parsing,
+                the numbers of records and lines, the bytes read and the slowest records are recorded in ``self.stats``.
+                See ``pybtexnbib.stats``. Parsing is not slowed down when this is not given.
+            diagnostics (str|Diagnostics, optional): How problems in malformed input (such as lines before the first tag
+                of a record) are handled: 'lenient' (the default) counts them and keeps the first of them
+                in ``self.diagnostics``, 'silent' only counts them
+                and 'strict' also passes each of them to ``handle_error``.
+                See ``pybtexnbib.diagnostics``.
+            key_strategy (str|callable): How the keys of the entries are built:
+                'author-year' (e.g. 'Smith2020', the default), 'pmid' (e.g. 'pmid20301770'), 'doi'
+                or a callable which is given the Entry and returns its key.
+                See ``pybtexnbib.keys``. It must be picklable when `workers` > 1.
+            unique_keys (bool): Whether repeated keys get a suffix ('Smith2020a', 'Smith2020b', ...)
+                when the entries are added to ``self.data`` rather than being reported as repeated entries.
+        """
         super().__init__(*args, **kwargs)
-        self.nbib_type_to_bibtex = {}
+        self.workers = workers
+        self.chunk_size = chunk_size
+        if cache is None:
+            cache = get_default_cache()
+        elif not isinstance(cache, NBIBCache):
+            cache = NBIBCache(cache)
+        self.cache = cache
+        self.mapping = mapping or default_mapping()
+        self.person_cache = person_cache or default_person_cache
+        self.lazy = lazy
+        self.record_filter = record_filter
+        self.key_strategy = key_strategy
+        self.get_key = get_key_function(key_strategy)
+        self.key_table = KeyTable() if unique_keys else None
+        if deduplicate is not None and not isinstance(deduplicate, Deduplicator):
+            deduplicate = Deduplicator(deduplicate)
+        self.deduplicator = deduplicate
+        if codes is not None:
+            # The keys, the record filter and deduplication need their codes even if they aren't in `codes`
+            codes = {*codes, *key_codes(key_strategy, self.mapping), *(getattr(record_filter, "codes", None) or ())}
+            if deduplicate is not None:
+                codes.update(deduplicate.codes)
+            codes = frozenset(codes)
+        self.codes = codes
+        self.cache_token = cache_token
+        if cache_token is None and not (is_cacheable_filter(record_filter) and isinstance(key_strategy, str)):
+            self.cache = None
+        if stats is True:
+            from .stats import ParseStatistics
 
-        with open(data_dir/"types.csv") as f:
-            reader = csv.reader(f, delimiter=',')
-            
-            #skip the header
-            next(reader, None)
+            stats = ParseStatistics()
+        self.stats = stats or None
+        if not isinstance(diagnostics, Diagnostics):
+            diagnostics = Diagnostics(diagnostics or LENIENT, handle_error=self.handle_error)
+        self.diagnostics = diagnostics
+        self.file_errors = {}
+        self._worker_arguments = (
+            args,
+            dict(
+                kwargs,
+                mapping=self.mapping,
+                person_cache=person_cache,
+                lazy=lazy,
+                codes=self.codes,
+                record_filter=record_filter,
+                key_strategy=key_strategy,
+                # Problems found by workers are sent back and handled by this parser
+                diagnostics=SILENT if diagnostics.mode == SILENT else LENIENT,
+            ),
+        )
 
-            for row in reader:
-                nbib_type = row[0]
-                bibtex_type = row[1]
-                self.nbib_type_to_bibtex[nbib_type] = bibtex_type
+    def handle_error(self, error):
+        """ Handles an NBIBSyntaxError for a problem in the input in strict mode, like pybtex's BibTeX parser. """
+        report_error(error)
 
-    def parse_stream(self, stream):
-        text = stream.read()
-        return self.parse_string(text)
-
-    def process_entry(self, entry_text):
-        # Read file into list and merge multi-line entries
-        nbib_fields = []
-        for line in entry_text.split('\n'):
-            m = re.match(r"^([A-Z]{2,4})\s*-\s*(.*)$", line.strip())
-            if m:
-                code = m.group(1)
-                value = m.group(2).strip()
-                nbib_fields.append( NBIBField(code=code, value=value) )
-            elif len(nbib_fields) > 0:
-                # If the line doesn't match the pattern then append the text to the previous field
-                nbib_fields[-1].value += line.strip()
+    def take_diagnostics(self):
+        """ Returns the problems found so far, or None if there are none, and starts collecting new ones. """
+        diagnostics = self.diagnostics
+        if not diagnostics:
+            return None
+        self.diagnostics = Diagnostics(diagnostics.mode, diagnostics.max_diagnostics, diagnostics.handle_error)
+        return diagnostics
+
+    @property
+    def nbib_type_to_bibtex(self):
+        return self.mapping.types
+
+    @classmethod
+    def suffixes(cls):
+        """ Returns the suffixes of the files read by the parser, including compressed files (e.g. '.nbib.gz'). """
+        return (cls.default_suffix, *(cls.default_suffix + suffix for suffix in COMPRESSION_MODULES))
+
+    def parse_file(self, filename, file_suffix=None):
+        if file_suffix is not None:
+            filename = filename + file_suffix
+        self.filename = filename
+        self.add_entries(self.load_file_entries(filename))
+        return self.data
+
+    def add_entries(self, entries):
+        """
+        Adds (key, Entry) pairs to ``self.data``, merging duplicates if the parser deduplicates
+        and making the keys unique if the parser has `unique_keys`.
+        """
+        stats = self.stats
+        key_table = self.key_table
+        if stats is None and key_table is None:
+            if self.deduplicator is None:
+                self.data.add_entries(entries)
             else:
-                warn(f"First line of NBIB file '{line}' is invalid.")
-                continue
-
-        # Parse nbib fields
-        nbib_dict = defaultdict(list)
-        for field in nbib_fields:
-            nbib_dict[field.code].append(field.value)
-
-        # Get publication type
-        nbib_publication_types = nbib_dict.pop("PT", [])
-        bibtex_types = {
-            self.nbib_type_to_bibtex[nbib_type] 
-            for nbib_type in nbib_publication_types 
-            if nbib_type in self.nbib_type_to_bibtex
-        }
-        bibtex_type = bibtex_types.pop() if len(bibtex_types) == 1 else "misc"
-        nbib_publication_description = "; ".join(nbib_publication_types)
+                self.deduplicator.add_entries(self.data, entries)
+            return
 
-        # Create Entry object
-        entry = Entry(bibtex_type)
-        if nbib_publication_description:
-            entry.fields["type"] = nbib_publication_description
-        
-        # Read People
-        def add_person(code, role):
-            names = nbib_dict.pop(code, [])
-            for name in names:
-                person = Person(name)
-                entry.add_person(person, role)
-
-        add_person("FAU", "author")
-        add_person("FED", "editor")     
-        # what should be done for AU and ED?   
-
-        # Read Other Fields
-        def add_field(code, bibtex_field, delimiter="; "):
-            values = nbib_dict.pop(code, [])
-            for value in values:
-                if bibtex_field in entry.fields:
-                    entry.fields[bibtex_field] += f"{delimiter}{value}"
-                else:
-                    entry.fields[bibtex_field] = value
-
-        add_field("TI", "title")
-        add_field("JT", "journal")
-        add_field("JTI", "shortjournal")
-        add_field("DP", "date")
-            
-        add_field("BTI", "booktitle")
-        add_field("PB", "publisher")
-        add_field("CY", "address")
-        add_field("VI", "volume")
-        add_field("PG", "pages")
-        add_field("OT", "keywords", delimiter=" | ")
-        add_field("GN", "note", delimiter=" | ")
-        add_field("ISBN", "isbn")
-        add_field("IS", "issn")
-        add_field("AB", "abstract")
-
-        add_field("AB", "abstract")
-
-        # Read year from date field if possible
-        if "date" in entry.fields:
-            m = re.match(r"^(\d{4})($|\D)", entry.fields['date'])
-            if m:
-                entry.fields['year'] = m.group(1)
-
-        # Get DOI
-        values = nbib_dict.pop("AID", [])
-        for value in values:
-            if "[doi]" in value:
-                entry.fields["doi"] = value.replace("[doi]", "").strip()
+        data_entries = self.data.entries
+        make_key = (lambda key: key_table.unique_key(key, data_entries)) if key_table is not None else None
+
+        for key, entry in entries:
+            if stats is not None:
+                start = perf_counter()
+            if self.deduplicator is not None:
+                self.deduplicator.add_entry(self.data, key, entry, make_key)
+            elif make_key is not None:
+                self.data.add_entry(make_key(key), entry)
             else:
-                nbib_dict["AID"].append(value)
+                self.data.add_entry(key, entry)
+            if stats is not None:
+                stats.add_time("add", perf_counter() - start)
 
-        # Add the remaining fields with the code as the field name
-        for code, values in nbib_dict.items():
-            entry.fields[code] = "; ".join(values)
+    def load_file_entries(self, filename):
+        """
+        Returns a list of the (key, Entry) pairs in a file from the cache or by parsing it.
 
-        entry_key = get_entry_key(entry)        
+        The problems found in the file are cached with its entries and added to ``self.diagnostics``
+        (and handled in strict mode) either way.
+        """
+        filename = locate_file(filename)
+        cache_key = self.cache.key(filename, self) if self.cache is not None else None
+        cached = self.cache.load(cache_key) if cache_key is not None else None
+        if cached is not None:
+            entries, diagnostics = cached
+            if diagnostics is not None:
+                self.diagnostics.extend(diagnostics)
+            return entries
 
-        return entry_key,entry
+        # The problems in this file are collected apart from the others so that they can be cached
+        diagnostics = self.diagnostics
+        self.diagnostics = Diagnostics(SILENT if diagnostics.mode == SILENT else LENIENT, diagnostics.max_diagnostics)
+        try:
+            entries = list(self.iter_entries(filename))
+        except UnicodeDecodeError as e:
+            raise PybtexError(str(e), filename=filename)
+        finally:
+            file_diagnostics, self.diagnostics = self.diagnostics, diagnostics
+        if cache_key is not None:
+            self.cache.store(cache_key, entries, file_diagnostics or None)
+        diagnostics.extend(file_diagnostics)
+        return entries
 
-    def parse_string(self, text):
-        self.unnamed_entry_counter = 1
-        self.command_start = 0
+    def parse_files(self, base_filenames, file_suffix=None, jobs=1, threads=False, skip_errors=False):
+        """
+        Parses many NBIB files concurrently and adds their entries to ``self.data``.
+
+        Each file is parsed in a pool of `jobs` processes (or threads) but the entries are added
+        in the order of the files, so the keys, the order of the entries and the handling of repeated keys
+        are the same as when the files are parsed one after another.
+        With `skip_errors`, files which cannot be read or parsed are skipped and their errors are stored
+        in ``self.file_errors`` (a dict from filename to exception) rather than raised.
+
+        Args:
+            base_filenames (iterable): The paths of the files. Directories are expanded to the files
+                in them which end with `file_suffix` (or ``default_suffix`` optionally followed by a compression suffix
+                such as '.gz'), in sorted order.
+            file_suffix (str, optional): A suffix added to each filename as in ``parse_file``.
+            jobs (int, optional): The number of files parsed at a time. Defaults to 1 which parses the files serially.
+                If None, the number of CPUs is used.
+            threads (bool): Whether to parse the files in threads rather than processes.
+            skip_errors (bool): Whether to skip files which cannot be read or parsed rather than raising their errors.
+        """
+        filenames = []
+        for filename in base_filenames:
+            if os.path.isdir(filename):
+                suffixes = (file_suffix,) if file_suffix else self.suffixes()
+                filenames.extend(str(path) for path in sorted(Path(filename).iterdir()) if path.name.endswith(suffixes))
+            elif file_suffix is not None:
+                filenames.append(locate_file(str(filename) + file_suffix))
+            else:
+                filenames.append(locate_file(filename))
+
+        jobs = jobs or os.cpu_count() or 1
+        if jobs == 1 or len(filenames) <= 1:
+            for filename in filenames:
+                self.filename = filename
+                try:
+                    entries = self.load_file_entries(filename)
+                except (OSError, UnicodeError, PybtexError) as error:
+                    if not skip_errors:
+                        raise
+                    self.file_errors[filename] = error
+                    continue
+                self.add_entries(entries)
+            return self.data
+
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-        entry_texts = re.split(r"ER\s+-", text)
-        entries = (self.process_entry(t) for t in entry_texts if t.strip())
-        self.data.add_entries(entries)
+        if threads:
+            serial_args, serial_kwargs = self._worker_arguments
+            executor = ThreadPoolExecutor(max_workers=jobs)
+
+            def parse(filename):
+                # A parser for each file keeps the problems found in each file apart
+                serial_parser = type(self)(*serial_args, **serial_kwargs)
+                return list(serial_parser.iter_entries(filename)), serial_parser.take_diagnostics()
+        else:
+            executor = ProcessPoolExecutor(
+                max_workers=jobs,
+                initializer=_init_worker,
+                initargs=(type(self), *self._worker_arguments),
+            )
+            parse = _parse_file_entries
+
+        with executor:
+            # The cache key and the cached entries or the future of the entries for each file, in the order of the files
+            pending = []
+            for filename in filenames:
+                try:
+                    cache_key = self.cache.key(filename, self) if self.cache is not None else None
+                except OSError as error:
+                    pending.append((filename, None, None, None, error))
+                    continue
+                cached = self.cache.load(cache_key) if cache_key is not None else None
+                future = executor.submit(parse, filename) if cached is None else None
+                pending.append((filename, cache_key, cached, future, None))
+
+            for filename, cache_key, cached, future, error in pending:
+                self.filename = filename
+                if future is not None:
+                    try:
+                        entries, diagnostics = future.result()
+                    except UnicodeDecodeError as e:
+                        error = PybtexError(str(e), filename=filename)
+                    except (OSError, UnicodeError, PybtexError) as e:
+                        error = e
+                    else:
+                        if cache_key is not None:
+                            self.cache.store(cache_key, entries, diagnostics)
+                elif cached is not None:
+                    entries, diagnostics = cached
+
+                if error is None and diagnostics is not None:
+                    try:
+                        self.diagnostics.extend(diagnostics)
+                    except PybtexError as e:
+                        # A problem in the file in strict mode
+                        error = e
+
+                if error is not None:
+                    if not skip_errors:
+                        for _, _, _, remaining, _ in pending:
+                            if remaining is not None:
+                                remaining.cancel()
+                        raise error
+                    self.file_errors[filename] = error
+                    continue
+
+                self.add_entries(entries)
+
+        return self.data
+
+    def options_signature(self):
+        """ Returns the options of the parser which change the entries it produces, e.g. for cache keys. """
+        return (
+            type(self).__module__,
+            type(self).__qualname__,
+            self.encoding,
+            self.mapping.signature(),
+            self.lazy,
+            tuple(sorted(self.codes)) if self.codes is not None else None,
+            repr(self.record_filter) if is_cacheable_filter(self.record_filter) else None,
+            self.key_strategy if isinstance(self.key_strategy, str) else None,
+            self.cache_token,
+            self.diagnostics.mode,
+        )
+
+    def parse_stream(self, stream):
+        self.add_entries(self.iter_entries(stream))
         return self.data
 
+    def iter_entries(self, path_or_stream):
+        """
+        Yields a (key, Entry) pair for each record in an NBIB file or stream.
+
+        Files ending in '.gz', '.bz2' or '.xz' are decompressed as they are read.
+
+        The entries are not added to ``self.data`` so nothing is kept in memory after it is yielded.
+        With more than one worker, each worker maps the same file and parses its own range of records,
+        so the workers share the operating system's page cache.
+        """
+        with self._open_records(path_or_stream, self.codes) as (records, mapped):
+            if self.workers <= 1:
+                yield from self.process_entries(records)
+            elif mapped is not None:
+                yield from self.process_file_in_parallel(*mapped)
+            else:
+                yield from self.process_entries_in_parallel(records)
+
+    @contextmanager
+    def _open_records(self, path_or_stream, codes):
+        """
+        Opens an NBIB file or stream and gives an iterator of its NBIBRecords with the fields of the given codes.
+
+        Files ending in '.gz', '.bz2' or '.xz' are decompressed as they are read. Other files are memory-mapped
+        if the encoding of the parser is ASCII compatible so that records are found as byte offsets in the mapped file
+        and only the field values are decoded. The problems in a file are reported with its name.
+
+        Yields:
+            tuple: The iterator of records and, for a memory-mapped file, its path and buffer (otherwise None)
+                so that the records can be parsed in parallel by ranges of the buffer.
+        """
+        if not isinstance(path_or_stream, (str, Path)):
+            yield self._stream_records(path_or_stream, codes), None
+            return
+
+        path = str(locate_file(path_or_stream))
+        previous_filename = self.diagnostics.filename
+        self.diagnostics.filename = path
+        try:
+            opener = get_compression_opener(path)
+            if opener is not None:
+                with opener(path, "rt", encoding=self.encoding) as stream:
+                    yield self._stream_records(stream, codes), None
+            elif not is_ascii_compatible(self.encoding):
+                with pybtex.io.open_unicode(path, encoding=self.encoding) as stream:
+                    yield self._stream_records(stream, codes), None
+            else:
+                with open(path, "rb") as f:
+                    if os.fstat(f.fileno()).st_size == 0:
+                        yield iter(()), None
+                        return
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                        if self.stats is not None:
+                            self.stats.count_buffer(buffer)
+                        spans = iter_record_spans(buffer, self.encoding, codes=codes, diagnostics=self.diagnostics)
+                        try:
+                            yield (record for _, _, record in spans), (path, buffer)
+                        finally:
+                            # Release the buffer before the file is unmapped if iteration stops early
+                            spans.close()
+        finally:
+            self.diagnostics.filename = previous_filename
+
+    def _stream_records(self, stream, codes):
+        if self.stats is not None:
+            stream = self.stats.counted(stream)
+        return tokenize(stream, codes, self.diagnostics)
+
+    async def aparse(self, stream, executor=None):
+        """
+        Parses an asynchronous stream of NBIB data without blocking the event loop and returns ``self.data``.
+
+        See ``aiter_entries`` for the arguments.
+        """
+        async for key, entry in self.aiter_entries(stream, executor=executor):
+            self.add_entries([(key, entry)])
+        return self.data
+
+    async def aiter_entries(self, stream, executor=None, read_size=DEFAULT_READ_SIZE):
+        """
+        Yields a (key, Entry) pair for each record in an asynchronous stream.
+
+        The stream is read in chunks and control is given back to the event loop after each record,
+        so many streams can be parsed concurrently on one event loop.
+
+        Args:
+            stream: An object with a coroutine ``read(size)`` method (e.g. ``asyncio.StreamReader``)
+                or an asynchronous iterable of chunks.
+                The chunks can be bytes (decoded with the parser's encoding) or text.
+            executor (concurrent.futures.Executor, optional): If given, entries are built in this executor
+                rather than on the event loop. Process pools get a copy of the parser's options.
+            read_size (int): The number of bytes or characters to read at a time.
+        """
+        import asyncio
+        import pickle
+        from concurrent.futures import ProcessPoolExecutor
+
+        loop = asyncio.get_running_loop()
+        parser_key = None
+        if isinstance(executor, ProcessPoolExecutor):
+            parser_key = pickle.dumps((type(self), *self._worker_arguments))
+
+        async for record in aiter_records(stream, self.encoding, self.codes, read_size, self.diagnostics):
+            if executor is None:
+                results = [self.process_entry(record)]
+            elif parser_key is not None:
+                results = await loop.run_in_executor(executor, _process_records_with, parser_key, [record])
+            else:
+                results = [await loop.run_in_executor(executor, self.process_entry, record)]
+
+            for result in results:
+                if result is not None:
+                    yield result
+
+    def iter_records(self, path_or_stream, codes=None):
+        """
+        Yields the NBIBRecord of each record in an NBIB file or stream without building entries.
+
+        Files are read in the same way as by ``iter_entries`` (memory-mapped or decompressed)
+        but always in this process.
+
+        Args:
+            codes (set, optional): The NBIB codes to read instead of the codes of the parser.
+        """
+        codes = self.codes if codes is None else frozenset(codes)
+        with self._open_records(path_or_stream, codes) as (records, _):
+            yield from records
+
+    def parse_table(self, path_or_stream, fields=None, multi_valued_codes=None):
+        """
+        Parses an NBIB file or stream into columns for analytics without building an Entry for each record.
+
+        The fields are built with the parser's mapping and the records are filtered with its record filter.
+        Unless the parser was given ``codes`` or a record filter, only the codes needed for the columns are read.
+
+        Args:
+            fields (list, optional): The BibTeX fields in the mapping to make columns for. Defaults to all of them.
+            multi_valued_codes (list, optional): The NBIB codes with values which are kept as lists,
+                e.g. ('FAU', 'MH', 'OT') which is the default.
+
+        Returns:
+            NBIBTable: The columns of the records.
+        """
+        from .columns import NBIBTable, DEFAULT_MULTI_VALUED_CODES
+
+        if multi_valued_codes is None:
+            multi_valued_codes = DEFAULT_MULTI_VALUED_CODES
+        table = NBIBTable(fields, multi_valued_codes, mapping=self.mapping, record_filter=self.record_filter)
+        codes = table.codes if self.codes is None and self.record_filter is None else None
+        table.add_records(self.iter_records(path_or_stream, codes=codes))
+        return table
+
+    def process_entries_in_parallel(self, records):
+        """
+        Builds entries for records in a pool of `self.workers` processes.
+
+        The records are sent to the workers in chunks and the entries are yielded in the original order.
+        """
+        if self.stats is not None:
+            records = self.stats.timed(records, "tokenize")
+        tasks = ((chunk,) for chunk in iter_chunks(records, self.chunk_size))
+        for entries in self.run_in_parallel(_process_records, tasks):
+            yield from self._counted_results(entries)
+
+    def process_file_in_parallel(self, path, buffer):
+        """
+        Builds entries for ranges of records in a memory-mapped file in a pool of `self.workers` processes.
+
+        The problems found by the workers are added to ``self.diagnostics`` with line numbers and record indexes
+        from the start of the file. Lines are only counted for ranges with problems.
+        """
+        ranges = find_record_ranges(buffer, self.file_chunk_size)
+        results = self.run_in_parallel(_process_file_range, ((path, start, end) for start, end in ranges))
+        record_offset = 0
+        counted_offset = 0
+        counted_lines = 0
+        for (start, _), (entries, diagnostics, record_count) in zip(ranges, results):
+            if diagnostics is not None:
+                counted_lines += count_lines(buffer, counted_offset, start)
+                counted_offset = start
+                self.diagnostics.extend(diagnostics, line_offset=counted_lines, record_offset=record_offset)
+            record_offset += record_count
+            yield from self._counted_results(entries)
+
+    def run_in_parallel(self, function, tasks):
+        """
+        Calls a function for each task in a pool of worker processes and yields the results in the order of the tasks.
+
+        Only a few tasks per worker are in flight at any time so that memory stays bounded.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        max_pending = 2 * self.workers
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(type(self), *self._worker_arguments),
+        ) as executor:
+            pending = deque()
+            for task in tasks:
+                pending.append(executor.submit(function, *task))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+
+    def _counted_results(self, results):
+        if self.stats is not None:
+            self.stats.records += len(results)
+        return results
+
+    def process_entries(self, records):
+        """ Yields a (key, Entry) pair for each record which is accepted by the record filter. """
+        if self.stats is not None:
+            records = self.stats.timed(records, "tokenize")
+        for record in records:
+            result = self.process_entry(record)
+            if result is not None:
+                yield result
+
+    def process_entry(self, record):
+        """
+        Builds an Entry from the fields of a single record.
+
+        Args:
+            record (NBIBRecord|str|list): The record from ``tokenize``, the text of the record
+                or a list of NBIBField objects.
+
+        Returns:
+            tuple: The entry key and the Entry object, or None if the record is rejected by the record filter.
+        """
+        if isinstance(record, str):
+            record = next(tokenize(record.splitlines(), self.codes), NBIBRecord())
+        elif not isinstance(record, NBIBRecord):
+            record = NBIBRecord(record)
+
+        timer = self.stats.start_record() if self.stats is not None else None
+
+        nbib_dict = group_fields(record)
+        if timer is not None:
+            timer.lap("group")
+        if self.record_filter is not None:
+            accepted = self.record_filter(nbib_dict)
+            if timer is not None:
+                timer.lap("filter")
+            if not accepted:
+                if timer is not None:
+                    timer.reject()
+                return None
+
+        bibtex_type, publication_description = get_entry_type(nbib_dict, self.mapping)
+        if timer is not None:
+            timer.lap("type")
+
+        if self.lazy:
+            entry = LazyEntry(bibtex_type, nbib_dict, self.mapping, self.person_cache, publication_description)
+            entry_key = self.get_key(nbib_dict, entry)
+            if timer is not None:
+                timer.lap("key")
+                timer.finish(entry_key)
+            return entry_key, entry
+
+        # Create Entry object
+        entry = Entry(bibtex_type)
+        entry.fields = build_fields(nbib_dict, self.mapping, publication_description)
+        if timer is not None:
+            timer.lap("fields")
+        entry.persons = build_persons(nbib_dict, self.mapping, self.person_cache)
+        if timer is not None:
+            timer.lap("persons")
+        entry_key = self.get_key(nbib_dict, entry)
+        if timer is not None:
+            timer.lap("key")
+            timer.finish(entry_key)
+
+        return entry_key, entry
+
+    def parse_string(self, text):
+        return self.parse_stream(io.StringIO(text))
+
 
 
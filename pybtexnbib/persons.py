@@ -0,0 +1,59 @@
+from functools import lru_cache
+from pybtex.database import Person
+
+
+DEFAULT_PERSON_CACHE_SIZE = 65536
+NAME_PART_ATTRIBUTES = ("first_names", "middle_names", "prelast_names", "last_names", "lineage_names")
+
+
+def parse_name_parts(name):
+    """ Splits a name with pybtex into a tuple of the first, middle, prelast, last and lineage names. """
+    person = Person(name)
+    return tuple(tuple(getattr(person, attribute)) for attribute in NAME_PART_ATTRIBUTES)
+
+
+class PersonCache:
+    """
+    A bounded least-recently-used cache of the parts of parsed names.
+
+    Splitting a name is one of the slower steps in building an entry and the same authors
+    appear many times in a corpus, so each distinct name is only split once.
+    A new Person object is still created for each name so that entries do not share mutable objects.
+    """
+
+    def __init__(self, maxsize=DEFAULT_PERSON_CACHE_SIZE):
+        """
+        Args:
+            maxsize (int): The maximum number of names to keep. Use 0 to disable caching.
+        """
+        self.maxsize = maxsize
+        self._parse_name_parts = lru_cache(maxsize=maxsize)(parse_name_parts)
+
+    def __reduce__(self):
+        # The cache itself isn't sent to worker processes, only its size
+        return (type(self), (self.maxsize,))
+
+    def person(self, name):
+        """ Returns a new Person object for a name. """
+        parts = self._parse_name_parts(name)
+        person = Person.__new__(Person)
+        for attribute, names in zip(NAME_PART_ATTRIBUTES, parts):
+            setattr(person, attribute, list(names))
+        return person
+
+    def info(self):
+        """ Returns the hits, misses, maxsize and currsize of the cache. """
+        return self._parse_name_parts.cache_info()
+
+    @property
+    def hit_rate(self):
+        info = self.info()
+        lookups = info.hits + info.misses
+        return info.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self._parse_name_parts.cache_clear()
+
+
+# The cache shared by parsers in this process unless they are given their own
+default_person_cache = PersonCache()
@@ -0,0 +1,144 @@
+import heapq
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .tokenizer import count_lines
+
+
+# The stages of parsing in the order they happen for each record
+STAGES = ("tokenize", "group", "filter", "type", "fields", "persons", "key", "add")
+
+
+class RecordTimer:
+    """ Times the stages of building the entry for a single record. """
+    __slots__ = ("stats", "start", "last", "stages")
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.start = self.last = perf_counter()
+        self.stages = {}
+
+    def lap(self, stage):
+        """ Records the time since the previous lap as the time of a stage. """
+        now = perf_counter()
+        self.stages[stage] = now - self.last
+        self.last = now
+
+    def finish(self, key):
+        self.stats.add_record(key, self.last - self.start, self.stages)
+
+    def reject(self):
+        """ Records the stages of a record which was rejected by the record filter. """
+        self.stats.rejected += 1
+        for stage, seconds in self.stages.items():
+            self.stats.add_time(stage, seconds)
+
+
+@dataclass
+class ParseStatistics:
+    """
+    Counts and timings of what NBIBParser has parsed, for finding out which stage of parsing is slow.
+
+    Give an instance (or True) to ``NBIBParser(stats=...)``. The time of each stage is the total over all records:
+        tokenize: reading and splitting the input into records (including decoding).
+        group: grouping the values of each record by code.
+        filter: the record filter.
+        type: finding the BibTeX entry type.
+        fields: building the fields (deferred with lazy entries).
+        persons: parsing author and editor names (deferred with lazy entries).
+        key: building the entry key.
+        add: adding the entries to the BibliographyData object.
+
+    The number of lines counts continuation lines. The bytes read are counted as characters for text streams.
+    When entries are built in worker processes (`workers` > 1), only the number of records,
+    the lines and bytes read and the 'tokenize' and 'add' stages are recorded.
+    """
+    slowest_count: int = 10
+    callback: Optional[Callable] = None
+    records: int = 0
+    rejected: int = 0
+    lines: int = 0
+    bytes_read: int = 0
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    slowest: List[Tuple[float, str]] = field(default_factory=list)
+
+    def add_time(self, stage, seconds):
+        self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    def start_record(self):
+        """ Returns a timer for the stages of building an entry. """
+        return RecordTimer(self)
+
+    def add_record(self, key, seconds, stages):
+        """
+        Adds the timings of a record whose entry has been built.
+
+        The callback, if there is one, is called with the key of the entry, the total time
+        and a dict of the time of each stage for this record.
+        """
+        self.records += 1
+        for stage, stage_seconds in stages.items():
+            self.add_time(stage, stage_seconds)
+
+        if len(self.slowest) < self.slowest_count:
+            heapq.heappush(self.slowest, (seconds, key))
+        elif self.slowest_count and seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (seconds, key))
+
+        if self.callback is not None:
+            self.callback(key, seconds, stages)
+
+    def timed(self, iterable, stage):
+        """ Yields the items of an iterable, adding the time spent waiting for each item to a stage. """
+        iterator = iter(iterable)
+        while True:
+            start = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_time(stage, perf_counter() - start)
+                return
+            self.add_time(stage, perf_counter() - start)
+            yield item
+
+    def count_buffer(self, buffer):
+        """ Counts the lines and bytes in a bytes-like buffer such as a memory-mapped file. """
+        self.bytes_read += len(buffer)
+        self.lines += count_lines(buffer)
+
+    def counted(self, lines):
+        """ Yields lines of text, counting the lines and characters read. """
+        for line in lines:
+            self.lines += 1
+            self.bytes_read += len(line)
+            yield line
+
+    @property
+    def total_seconds(self):
+        return sum(self.stage_seconds.values())
+
+    def slowest_records(self):
+        """ Returns a list of (seconds, key) tuples of the slowest records, slowest first. """
+        return sorted(self.slowest, reverse=True)
+
+    def report(self):
+        """ Returns a summary of the statistics as text. """
+        total = self.total_seconds
+        lines = [
+            f"{self.records} records ({self.rejected} rejected), {self.lines} lines, "
+            f"{self.bytes_read} bytes in {total:.3f} s"
+        ]
+        order = {stage: index for index, stage in enumerate(STAGES)}
+        for stage in sorted(self.stage_seconds, key=lambda stage: order.get(stage, len(STAGES))):
+            seconds = self.stage_seconds[stage]
+            share = seconds / total if total else 0.0
+            lines.append(f"  {stage:<10} {seconds:10.3f} s {share:7.1%}")
+        for seconds, key in self.slowest_records():
+            lines.append(f"  slowest: {key} {seconds * 1000:.2f} ms")
+        return "\n".join(lines)
+
+    def clear(self):
+        self.records = self.rejected = self.lines = self.bytes_read = 0
+        self.stage_seconds.clear()
+        self.slowest.clear()
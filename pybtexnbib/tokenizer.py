@@ -0,0 +1,383 @@
+import re
+import sys
+from dataclasses import dataclass
+from warnings import warn
+
+from .diagnostics import INVALID_LINE
+
+
+TAG_REGEX = re.compile(r"([A-Z]{2,4})\s*-\s*(.*)$")
+# Matches each line with groups for the indentation, the tag (if any) and the value
+LINE_BYTES_REGEX = re.compile(
+    rb"^([ \t\r\f\v]*)(?:([A-Z]{2,4})[ \t\f\v]*-[ \t\f\v]*)?([^\n]*)$", re.MULTILINE
+)
+RECORD_BOUNDARY_BYTES_REGEX = re.compile(rb"\n(?:[ \t\f\v\r]*|ER[ \t]*-[^\n]*)\n")
+END_OF_RECORD_CODE = "ER"
+# The number of bytes searched for line breaks at a time by `count_lines`
+COUNT_BLOCK_SIZE = 1024 * 1024
+
+
+@dataclass
+class NBIBField:
+    """ A field in a NBIB file. """
+    code: str
+    value: str
+
+
+class NBIBRecord:
+    """
+    The fields of a single record in a NBIB file.
+
+    The codes and values are kept in two parallel lists and the codes are interned,
+    so a record costs two lists rather than an object per field.
+    It is cheap to pickle, e.g. to send records to worker processes.
+    Iterating over a record yields (code, value) tuples.
+    """
+    __slots__ = ("codes", "values")
+
+    def __init__(self, fields=(), codes=None, values=None):
+        """
+        Args:
+            fields (iterable): (code, value) tuples or NBIBField objects to start the record with.
+            codes (list, optional): The list of codes.
+                If given then `values` must be given too and they are used directly.
+            values (list, optional): The list of values, in the same order as `codes`.
+        """
+        if codes is not None:
+            self.codes = codes
+            self.values = values
+            return
+
+        self.codes = []
+        self.values = []
+        for field in fields:
+            if isinstance(field, NBIBField):
+                self.append(field.code, field.value)
+            else:
+                self.append(*field)
+
+    def append(self, code, value):
+        self.codes.append(sys.intern(code))
+        self.values.append(value)
+
+    def __iter__(self):
+        return zip(self.codes, self.values)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __bool__(self):
+        return bool(self.codes)
+
+    def __eq__(self, other):
+        if not isinstance(other, NBIBRecord):
+            return NotImplemented
+        return self.codes == other.codes and self.values == other.values
+
+    def __repr__(self):
+        return f"NBIBRecord({list(self)!r})"
+
+    def __reduce__(self):
+        return (_rebuild_record, (self.codes, self.values))
+
+    def get(self, code, default=None):
+        """ Returns the first value for a code or `default` if the code isn't in the record. """
+        try:
+            return self.values[self.codes.index(code)]
+        except ValueError:
+            return default
+
+    def get_all(self, code):
+        """ Returns a list of all the values for a code. """
+        return [value for field_code, value in zip(self.codes, self.values) if field_code == code]
+
+    def fields(self):
+        """ Returns the fields of the record as a list of NBIBField objects. """
+        return [NBIBField(code=code, value=value) for code, value in self]
+
+
+def report_invalid_line(diagnostics, line, line_number, record_index):
+    """ Reports a line with text before the first tag of a record, or warns about it if there are no diagnostics. """
+    if diagnostics is None:
+        warn(f"First line of NBIB file '{line}' is invalid.")
+    else:
+        diagnostics.report(
+            INVALID_LINE, f"Invalid line before the first tag of a record: '{line}'", line_number, record_index, line
+        )
+
+
+def count_lines(buffer, start=0, end=None):
+    """ Counts the line breaks in part of a bytes-like buffer (e.g. a memory-mapped file) without copying all of it. """
+    if end is None:
+        end = len(buffer)
+    return sum(
+        buffer[offset : min(offset + COUNT_BLOCK_SIZE, end)].count(b"\n")
+        for offset in range(start, end, COUNT_BLOCK_SIZE)
+    )
+
+
+def _rebuild_record(codes, values):
+    # Codes are interned again when unpickled in another process
+    return NBIBRecord(codes=[sys.intern(code) for code in codes], values=values)
+
+
+class LineTokenizer:
+    """
+    Groups lines in NBIB format into records of fields in a single pass.
+
+    The indentation of the first tag in a record gives the tag column for that record.
+    A line indented past the tag column always continues the previous field.
+    Otherwise a tagged line starts a new field, or ends the record if the tag is 'ER',
+    and an untagged line continues the previous field.
+    A blank line also ends the record once it has a tag.
+
+    Lines can be fed in batches as they arrive (e.g. from a network stream) because the state
+    of the current record is kept between calls to ``feed``. Call ``close`` at the end of the input.
+    """
+
+    def __init__(self, codes=None, diagnostics=None):
+        """
+        Args:
+            codes (set, optional): If given, only fields with these codes are kept.
+                The values and continuation lines of other fields are skipped.
+            diagnostics (Diagnostics, optional): Where problems in the input are reported.
+                If not given, a warning is given for each invalid line.
+        """
+        self.codes = codes
+        self.diagnostics = diagnostics
+        # The number of lines and records which have been read
+        self.line_number = 0
+        self.record_index = 0
+        self.record = NBIBRecord()
+        self.tag_column = None
+        self.skipping = False
+        # The pieces of the last value when it has continuation lines. They are joined once when the value is complete.
+        self.continuation = None
+
+    def feed(self, lines):
+        """
+        Tokenizes a batch of lines.
+
+        Yields:
+            NBIBRecord: The fields of each record which is completed in these lines.
+        """
+        codes = self.codes
+        record = self.record
+        tag_column = self.tag_column
+        skipping = self.skipping
+        continuation = self.continuation
+        line_number = self.line_number
+        try:
+            for line_number, line in enumerate(lines, line_number + 1):
+                content = line.strip()
+                if not content:
+                    if tag_column is not None:
+                        if continuation:
+                            record.values[-1] = "".join(continuation)
+                            continuation = None
+                        self.record_index += 1
+                        yield record
+                        record = NBIBRecord()
+                        tag_column = None
+                    continue
+
+                # A line is only indented past the tag column
+                # if everything up to and including that column is whitespace
+                if tag_column is None or not line[: tag_column + 1].isspace():
+                    m = TAG_REGEX.match(content)
+                    if m:
+                        if continuation:
+                            record.values[-1] = "".join(continuation)
+                            continuation = None
+                        code = m.group(1)
+                        if code == END_OF_RECORD_CODE:
+                            if tag_column is not None:
+                                self.record_index += 1
+                                yield record
+                            record = NBIBRecord()
+                            tag_column = None
+                            continue
+                        if tag_column is None:
+                            tag_column = len(line) - len(line.lstrip())
+                        skipping = codes is not None and code not in codes
+                        if not skipping:
+                            record.append(code, m.group(2))
+                        continue
+
+                if tag_column is None:
+                    report_invalid_line(self.diagnostics, line.rstrip(), line_number, self.record_index)
+                elif not skipping:
+                    # If the line doesn't start a field then append the text to the previous field
+                    if continuation is None:
+                        continuation = [record.values[-1]]
+                    continuation.append(content)
+        finally:
+            self.record = record
+            self.tag_column = tag_column
+            self.skipping = skipping
+            self.continuation = continuation
+            self.line_number = line_number
+
+    def close(self):
+        """
+        Finishes the input.
+
+        Yields:
+            NBIBRecord: The last record if it wasn't ended by a blank line or an 'ER' tag.
+        """
+        record = self.record
+        if self.tag_column is not None:
+            if self.continuation:
+                record.values[-1] = "".join(self.continuation)
+            self.record_index += 1
+            yield record
+
+        self.record = NBIBRecord()
+        self.tag_column = None
+        self.skipping = False
+        self.continuation = None
+
+
+def tokenize(lines, codes=None, diagnostics=None):
+    """
+    Groups lines in NBIB format into records of fields in a single pass (see ``LineTokenizer``).
+
+    Args:
+        lines (iterable): The lines of the NBIB text, e.g. an open text file.
+        codes (set, optional): If given, only fields with these codes are kept.
+            The values and continuation lines of other fields are skipped.
+        diagnostics (Diagnostics, optional): Where problems in the input are reported.
+            If not given, a warning is given for each invalid line.
+
+    Yields:
+        NBIBRecord: The fields of each record.
+    """
+    tokenizer = LineTokenizer(codes, diagnostics)
+    yield from tokenizer.feed(lines)
+    yield from tokenizer.close()
+
+
+def is_ascii_compatible(encoding):
+    """ Checks whether tags and line breaks have the same bytes in an encoding as in ASCII. """
+    text = "ER  -\n"
+    return text.encode(encoding) == text.encode("ascii")
+
+
+def iter_record_spans(buffer, encoding="utf-8", start=0, end=None, codes=None, diagnostics=None):
+    """
+    Groups the lines of a bytes-like buffer in NBIB format into records, e.g. for a memory-mapped file.
+
+    This follows the same rules as ``tokenize`` but finds lines, tags and records as offsets into the buffer,
+    so the only bytes which are copied and decoded are the field values.
+    The encoding must be ASCII compatible (see ``is_ascii_compatible``).
+
+    Args:
+        buffer (bytes-like): The NBIB data, e.g. an ``mmap.mmap`` object.
+        encoding (str): The encoding used to decode the field values.
+        start (int): The offset in the buffer to start from. This should be at the start of a line.
+        end (int, optional): The offset in the buffer to stop at. Defaults to the end of the buffer.
+        codes (set, optional): If given, only fields with these codes are kept.
+            The values and continuation lines of other fields are skipped without being decoded.
+        diagnostics (Diagnostics, optional): Where problems in the input are reported.
+            If not given, a warning is given for each invalid line.
+            Line numbers and record indexes count from `start`. Lines are only counted when there is a problem.
+
+    Yields:
+        tuple: The start offset, end offset and NBIBRecord for each record.
+    """
+    if end is None:
+        end = len(buffer)
+
+    # The number of records yielded, and the number of lines up to an offset for reporting problems
+    record_index = 0
+    counted_offset = start
+    counted_lines = 0
+
+    record = NBIBRecord()
+    tag_column = None
+    skipping = False
+    # The pieces of the last value when it has continuation lines. They are joined once when the value is complete.
+    continuation = None
+    record_start = start
+    for m in LINE_BYTES_REGEX.finditer(buffer, start, end):
+        indent_end, line_end = m.end(1), m.end()
+        if indent_end == line_end:
+            if tag_column is not None:
+                if continuation:
+                    record.values[-1] = "".join(continuation)
+                    continuation = None
+                record_index += 1
+                yield record_start, m.start(), record
+                record = NBIBRecord()
+                tag_column = None
+            continue
+
+        indent = indent_end - m.start()
+        code = m.group(2)
+        if code and (tag_column is None or indent <= tag_column):
+            if continuation:
+                record.values[-1] = "".join(continuation)
+                continuation = None
+            code = code.decode("ascii")
+            if code == END_OF_RECORD_CODE:
+                if tag_column is not None:
+                    record_index += 1
+                    yield record_start, min(m.end() + 1, end), record
+                record = NBIBRecord()
+                tag_column = None
+                continue
+            if tag_column is None:
+                tag_column = indent
+                record_start = m.start()
+            skipping = codes is not None and code not in codes
+            if not skipping:
+                record.append(code, buffer[m.start(3) : line_end].decode(encoding).rstrip())
+        elif tag_column is None:
+            line = buffer[m.start() : line_end].decode(encoding, errors="replace").rstrip()
+            counted_lines += count_lines(buffer, counted_offset, m.start())
+            counted_offset = m.start()
+            report_invalid_line(diagnostics, line, counted_lines + 1, record_index)
+        elif not skipping:
+            # If the line doesn't start a field then append the text to the previous field
+            if continuation is None:
+                continuation = [record.values[-1]]
+            continuation.append(buffer[indent_end:line_end].decode(encoding).rstrip())
+
+    if tag_column is not None:
+        if continuation:
+            record.values[-1] = "".join(continuation)
+        yield record_start, end, record
+
+
+def tokenize_buffer(buffer, encoding="utf-8", start=0, end=None, codes=None, diagnostics=None):
+    """
+    Groups the lines of a bytes-like buffer in NBIB format into records.
+
+    Yields:
+        NBIBRecord: The fields of each record.
+    """
+    for _, _, record in iter_record_spans(buffer, encoding, start, end, codes, diagnostics):
+        yield record
+
+
+def find_record_ranges(buffer, chunk_size, start=0, end=None):
+    """
+    Splits a bytes-like buffer in NBIB format into ranges of about `chunk_size` bytes which do not split a record.
+
+    Ranges are only split after a blank line or an 'ER' tag at the start of a line.
+
+    Returns:
+        list: Tuples with the start and end offset of each range.
+    """
+    if end is None:
+        end = len(buffer)
+
+    offsets = [start]
+    while offsets[-1] + chunk_size < end:
+        m = RECORD_BOUNDARY_BYTES_REGEX.search(buffer, offsets[-1] + chunk_size, end)
+        if not m or m.end() >= end:
+            break
+        offsets.append(m.end())
+    offsets.append(end)
+
+    return list(zip(offsets[:-1], offsets[1:]))
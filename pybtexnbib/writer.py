@@ -0,0 +1,146 @@
+import re
+from pybtex.database.output import BaseWriter
+
+from .entries import DOI_MARKER
+from .mapping import DEFAULT_DELIMITER, PUBLICATION_TYPE_CODE, default_mapping
+
+
+# Fields named like NBIB codes are written back under their code
+CODE_REGEX = re.compile(r"^[A-Z]{2,4}$")
+# The indentation of continuation lines: each value starts in the 7th column after a 4 character tag and '- '
+CONTINUATION_INDENT = " " * 6
+# Codes with free text which are never split into repeated lines on their delimiter
+TEXT_CODES = frozenset(["TI", "AB", "BTI", "JT", "TT", "VTI", "CI"])
+# The standard BibTeX fields, which are never written as NBIB codes
+# even if they are upper case (e.g. 'YEAR' or 'DOI')
+BIBTEX_FIELDS = frozenset(
+    "address annote author booktitle chapter crossref doi edition editor howpublished institution isbn issn "
+    "journal key month note number organization pages publisher school series title type url volume year".split()
+)
+# The publication types written for BibTeX entry types which more than one NBIB publication type maps to
+PREFERRED_PUBLICATION_TYPES = {"book": "Monograph"}
+
+
+class NBIBWriter(BaseWriter):
+    """
+    Writes bibliography data in NBIB format, reversing the mapping used by NBIBParser.
+
+    Mapped fields are written under their NBIB codes (e.g. 'title' as 'TI'), persons as full names (e.g. 'FAU'),
+    'doi' as 'AID - ... [doi]' and fields named like NBIB codes (e.g. 'PMID') under that code.
+    Values which were joined from repeated codes are split back into one line per value.
+    Other BibTeX fields have no NBIB code and are not written.
+
+    Each entry is written to the stream as soon as it has been formatted, so ``write_entries`` can convert
+    entries from ``NBIBParser.iter_entries`` (or any other iterable) without keeping them in memory.
+    """
+    default_suffix = '.nbib'
+    unicode_io = True
+
+    def __init__(self, encoding=None, mapping=None, width=None):
+        """
+        Args:
+            mapping (NBIBMapping, optional): The mapping between NBIB codes and BibTeX.
+                Defaults to the parser's default mapping.
+            width (int, optional): The maximum width of lines (e.g. 80 like PubMed). Longer values are wrapped at spaces
+                onto continuation lines indented by six spaces. If None (the default), values are not wrapped.
+                NBIBParser joins continuation lines without a space, so wrapped values don't survive a round trip.
+        """
+        super().__init__(encoding=encoding)
+        self.mapping = mapping or default_mapping()
+        self.width = width
+
+        # The first code for each BibTeX field and entry type
+        self.field_codes = {}
+        for code, field, delimiter in self.mapping.fields:
+            self.field_codes.setdefault(field.lower(), (code, delimiter))
+        self.type_descriptions = {}
+        for nbib_type, bibtex_type in self.mapping.types.items():
+            self.type_descriptions.setdefault(bibtex_type, nbib_type)
+        for bibtex_type, nbib_type in PREFERRED_PUBLICATION_TYPES.items():
+            if self.mapping.types.get(nbib_type) == bibtex_type:
+                self.type_descriptions[bibtex_type] = nbib_type
+
+    def format_line(self, code, value):
+        """ Formats a code and its value as a line, wrapping it onto continuation lines if it is too long. """
+        line = f"{code:<4}- {value}"
+        width = self.width
+        if not width or len(line) <= width:
+            return line
+
+        # Break at the last space which fits, or after a word which is longer than the line
+        indent = len(CONTINUATION_INDENT)
+        lines = []
+        while len(line) > width:
+            cut = line.rfind(" ", indent + 1, width + 1)
+            if cut == -1:
+                cut = line.find(" ", width)
+                if cut == -1:
+                    break
+            lines.append(line[:cut].rstrip())
+            line = CONTINUATION_INDENT + line[cut:].lstrip()
+        lines.append(line)
+        return "\n".join(lines)
+
+    def is_code_field(self, field):
+        """ Checks whether a field is named like an NBIB code (e.g. 'LA') which isn't written in another way. """
+        folded = field.lower()
+        return (
+            CODE_REGEX.match(field) is not None
+            and field not in ("PMID", "AID")
+            and field not in self.mapping.mapped_codes
+            and folded not in BIBTEX_FIELDS
+            and folded not in self.field_codes
+        )
+
+    def entry_lines(self, entry):
+        """ Returns a list of the lines of an entry in NBIB format. """
+        fields = entry.fields
+        items = list(fields.items())
+        lines = []
+
+        def add(code, value, delimiter=DEFAULT_DELIMITER):
+            values = [value] if code in TEXT_CODES else value.split(delimiter)
+            lines.extend(self.format_line(code, value) for value in values if value)
+
+        if "PMID" in fields:
+            add("PMID", fields["PMID"])
+
+        publication_description = fields.get("type") or self.type_descriptions.get(entry.type)
+        if publication_description:
+            add(PUBLICATION_TYPE_CODE, publication_description)
+
+        # BibTeX field names are case insensitive
+        for field, value in items:
+            if field.lower() in self.field_codes:
+                code, delimiter = self.field_codes[field.lower()]
+                add(code, value, delimiter)
+        if "year" in fields and "date" not in fields:
+            add("DP", fields["year"])
+
+        for code, role in self.mapping.persons:
+            for person in entry.persons.get(role, ()):
+                lines.append(self.format_line(code, str(person)))
+
+        for field, value in items:
+            if self.is_code_field(field):
+                add(field, value)
+
+        if "doi" in fields:
+            lines.append(self.format_line("AID", f"{fields['doi']} {DOI_MARKER}"))
+        if "AID" in fields:
+            add("AID", fields["AID"])
+
+        return lines
+
+    def write_entry(self, entry, stream):
+        """ Writes a single entry to a stream followed by a blank line. """
+        stream.write("\n".join(self.entry_lines(entry)))
+        stream.write("\n\n")
+
+    def write_entries(self, entries, stream):
+        """ Writes (key, Entry) pairs from an iterable (e.g. ``NBIBParser.iter_entries``) to a stream one at a time. """
+        for _, entry in entries:
+            self.write_entry(entry, stream)
+
+    def write_stream(self, bib_data, stream):
+        self.write_entries(bib_data.entries.items(), stream)
@@ -0,0 +1,82 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from pybtexnbib import NBIBParser, aiter_entries
+
+from .test_parsers import marcelis, MultipleRecordsTest
+
+files_dir = Path(__file__).parent / "files"
+
+
+class AsyncBytesStream:
+    """ A stream with a coroutine read method like asyncio.StreamReader. """
+
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+
+    async def read(self, size=-1):
+        await asyncio.sleep(0)
+        chunk = self.data[self.position : self.position + size]
+        self.position += len(chunk)
+        return chunk
+
+
+async def aiter_text_chunks(text, size):
+    for start in range(0, len(text), size):
+        yield text[start : start + size]
+
+
+def marcelis_bytes():
+    return (files_dir / "marcelis-20301770.nbib").read_bytes()
+
+
+def test_aparse_bytes_stream():
+    async def main():
+        # A small read size splits multi-byte characters and '\r\n' line endings between chunks
+        parser = NBIBParser()
+        async for key, entry in parser.aiter_entries(AsyncBytesStream(marcelis_bytes()), read_size=7):
+            parser.data.add_entry(key, entry)
+        return parser.data
+
+    assert asyncio.run(main()) == marcelis
+
+
+def test_aparse_text_chunks():
+    async def main():
+        return await NBIBParser().aparse(aiter_text_chunks(MultipleRecordsTest.input_string, 5))
+
+    assert asyncio.run(main()) == MultipleRecordsTest.correct_result
+
+
+def test_aiter_entries_function():
+    async def main():
+        stream = aiter_text_chunks(MultipleRecordsTest.input_string, 1000)
+        return [key async for key, _ in aiter_entries(stream, codes={"PMID", "TI", "DP"})]
+
+    assert asyncio.run(main()) == ['First.Title2020', 'Second.Title2021', 'Third.Title2022']
+
+
+def test_aparse_executors():
+    async def main(executor):
+        return await NBIBParser().aparse(AsyncBytesStream(marcelis_bytes()), executor=executor)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        assert asyncio.run(main(executor)) == marcelis
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        assert asyncio.run(main(executor)) == marcelis
+
+
+def test_concurrent_streams_interleave():
+    order = []
+
+    async def consume(name):
+        async for _, entry in NBIBParser().aiter_entries(aiter_text_chunks(MultipleRecordsTest.input_string, 1000)):
+            order.append((name, entry.fields["PMID"]))
+
+    async def main():
+        await asyncio.gather(consume("a"), consume("b"))
+
+    asyncio.run(main())
+    assert order[:2] == [("a", "1"), ("b", "1")]
+    assert len(order) == 6
@@ -0,0 +1,44 @@
+import json
+
+from pybtexnbib import NBIBParser
+from benchmarks.corpus import corpus_path, unique_surname, write_corpus
+from benchmarks.run import compare, run
+
+
+def test_unique_surname():
+    surnames = {unique_surname(number) for number in range(10000)}
+    assert len(surnames) == 10000
+
+
+def test_write_corpus(tmp_path):
+    path = write_corpus(tmp_path / "corpus.nbib", 50, seed=1)
+    assert path.read_bytes() == write_corpus(tmp_path / "again.nbib", 50, seed=1).read_bytes()
+    assert path.read_bytes() != write_corpus(tmp_path / "other.nbib", 50, seed=2).read_bytes()
+    assert b"\r\n" in path.read_bytes()
+
+    data = NBIBParser(cache=None).parse_file(str(path))
+    assert len(data.entries) == 50
+    for entry in data.entries.values():
+        assert entry.fields["doi"].endswith(entry.fields["PMID"])
+        assert "\n" not in entry.fields["abstract"]
+        assert entry.persons["author"]
+
+
+def test_corpus_path(tmp_path):
+    path = corpus_path(tmp_path, 10)
+    assert path.name == "synthetic-10-0.nbib"
+    modified = path.stat().st_mtime_ns
+    assert corpus_path(tmp_path, 10).stat().st_mtime_ns == modified
+
+
+def test_run(tmp_path):
+    results = run(sizes=[20], benchmarks=["parse_string", "format_from_file"], corpus_dir=tmp_path, verbose=False)
+    assert [result["benchmark"] for result in results["results"]] == ["parse_string", "format_from_file"]
+    for result in results["results"]:
+        assert result["records"] == 20
+        assert result["records_per_second"] > 0
+
+    output = tmp_path / "results.json"
+    output.write_text(json.dumps(results), encoding="utf-8")
+    assert len(compare(results, json.loads(output.read_text(encoding="utf-8")))) == 2
+    assert "1.00x records/s" in compare(results, results)[0]
@@ -0,0 +1,155 @@
+import os
+import shutil
+from pathlib import Path
+from pybtex import format_from_file
+from pybtexnbib import NBIBParser, NBIBCache
+from pybtexnbib import cache as cache_module
+
+from .test_parsers import marcelis
+from .test_format import marcelis as marcelis_formatted
+
+files_dir = Path(__file__).parent / "files"
+
+
+def copy_marcelis(tmp_path):
+    path = tmp_path / "marcelis.nbib"
+    shutil.copy(files_dir / "marcelis-20301770.nbib", path)
+    return path
+
+
+def test_cache_hit_and_miss(tmp_path):
+    path = copy_marcelis(tmp_path)
+    cache = NBIBCache(tmp_path / "cache")
+
+    assert NBIBParser(cache=cache).parse_file(path) == marcelis
+    assert cache.statistics.misses == 1
+    assert cache.statistics.stores == 1
+
+    assert NBIBParser(cache=cache).parse_file(path) == marcelis
+    assert cache.statistics.hits == 1
+    assert cache.statistics.hit_rate == 0.5
+
+
+def test_cache_invalidated_by_change(tmp_path):
+    path = copy_marcelis(tmp_path)
+    cache = NBIBCache(tmp_path / "cache")
+    NBIBParser(cache=cache).parse_file(path)
+
+    path.write_text("PMID- 1\nTI  - Changed\n", encoding="utf-8")
+    data = NBIBParser(cache=cache).parse_file(path)
+    assert list(data.entries.keys()) == ["Changed"]
+    assert cache.statistics.misses == 2
+
+
+def test_cache_hash_content(tmp_path):
+    path = copy_marcelis(tmp_path)
+    cache = NBIBCache(tmp_path / "cache", hash_content=True)
+    NBIBParser(cache=cache).parse_file(path)
+    os.utime(path, ns=(0, 0))
+    assert NBIBParser(cache=cache).parse_file(path) == marcelis
+    assert cache.statistics.hits == 1
+
+
+def test_cache_keyed_on_parser_options(tmp_path):
+    path = copy_marcelis(tmp_path)
+    cache = NBIBCache(tmp_path / "cache")
+    NBIBParser(cache=cache, encoding="utf-8").parse_file(path)
+    NBIBParser(cache=cache, encoding="latin-1").parse_file(path)
+    assert cache.statistics.misses == 2
+
+
+def test_cache_keyed_on_version(tmp_path, monkeypatch):
+    path = copy_marcelis(tmp_path)
+    monkeypatch.setattr(cache_module, "package_version", lambda: "0.0.1")
+    NBIBParser(cache=NBIBCache(tmp_path / "cache")).parse_file(path)
+    monkeypatch.undo()
+
+    cache = NBIBCache(tmp_path / "cache")
+    NBIBParser(cache=cache).parse_file(path)
+    assert cache.statistics.misses == 1
+    assert cache.statistics.hits == 0
+
+
+def test_cache_hit_when_evicted_while_loading(tmp_path, monkeypatch):
+    path = copy_marcelis(tmp_path)
+    cache = NBIBCache(tmp_path / "cache")
+    NBIBParser(cache=cache).parse_file(path)
+
+    def utime(path):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(cache_module.os, "utime", utime)
+    assert NBIBParser(cache=cache).parse_file(path) == marcelis
+    assert cache.statistics.hits == 1
+
+
+def test_cache_eviction(tmp_path):
+    cache = NBIBCache(tmp_path / "cache", max_size=1)
+    for index in range(3):
+        path = tmp_path / f"{index}.nbib"
+        path.write_text(f"PMID- {index}\nTI  - Title {index}\n", encoding="utf-8")
+        NBIBParser(cache=cache).parse_file(path)
+
+    assert cache.statistics.evictions == 3
+    assert cache.size() == 0
+
+    cache.max_size = 10 * 1024 * 1024
+    NBIBParser(cache=cache).parse_file(path)
+    assert cache.statistics.evictions == 3
+    assert cache.size() > 0
+    cache.clear()
+    assert cache.size() == 0
+
+
+def test_default_cache_from_environment(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "_default_cache", None)
+    monkeypatch.setenv("PYBTEXNBIB_CACHE_DIR", str(tmp_path / "cache"))
+    path = copy_marcelis(tmp_path)
+    for _ in range(2):
+        result = format_from_file(path, style="plain", output_backend="plaintext", bib_format="nbib")
+        assert result == marcelis_formatted
+
+    statistics = cache_module.get_default_cache().statistics
+    assert statistics.hits == 1
+    assert statistics.misses == 1
+
+
+def test_cache_bypassed_for_custom_options(tmp_path):
+    from pybtexnbib.filters import AllOf, YearRange
+
+    class Everything:
+        def __repr__(self):
+            return "Everything()"
+
+        def __call__(self, nbib_dict):
+            return True
+
+    path = copy_marcelis(tmp_path)
+    cache = NBIBCache(tmp_path / "cache")
+    for _ in range(3):
+        assert NBIBParser(cache=cache, record_filter=lambda nbib_dict: True).parse_file(path) == marcelis
+        assert NBIBParser(cache=cache, record_filter=Everything()).parse_file(path) == marcelis
+        record_filter = AllOf(YearRange(1990), Everything())
+        assert NBIBParser(cache=cache, record_filter=record_filter).parse_file(path) == marcelis
+        NBIBParser(cache=cache, key_strategy=lambda entry: entry.fields["PMID"]).parse_file(path)
+    assert cache.statistics == cache_module.CacheStatistics()
+    assert cache.size() == 0
+
+    for _ in range(2):
+        NBIBParser(cache=cache, record_filter=YearRange(1990), key_strategy="pmid").parse_file(path)
+    assert cache.statistics.hits == 1
+
+
+def test_cache_token(tmp_path):
+    path = copy_marcelis(tmp_path)
+    cache = NBIBCache(tmp_path / "cache")
+    def pmid_key(entry):
+        return entry.fields["PMID"]
+
+    for _ in range(2):
+        data = NBIBParser(cache=cache, cache_token="pmid-v1", key_strategy=pmid_key).parse_file(path)
+        assert list(data.entries.keys()) == ["20301770"]
+    assert cache.statistics.hits == 1
+
+    NBIBParser(cache=cache, cache_token="pmid-v2", key_strategy=pmid_key).parse_file(path)
+    assert cache.statistics.misses == 2
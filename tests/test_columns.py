@@ -0,0 +1,96 @@
+import gzip
+from pathlib import Path
+
+import pytest
+
+from pybtexnbib import NBIBParser, NBIBTable
+from pybtexnbib.columns import MISSING
+from pybtexnbib.filters import YearRange
+
+TEST_DIR = Path(__file__).parent
+MARCELIS = TEST_DIR / "files/marcelis-20301770.nbib"
+
+RECORDS = (
+    "PMID- 1\nTI  - First\nDP  - 2020 Jan\nJT  - Journal One\nFAU - Smith, John\nFAU - Jones, Ann\nMH  - Humans\n"
+    "OT  - genes\nOT  - cells\nPT  - Journal Article\nAID - 10.1000/one [doi]\nAB  - An abstract\n\n"
+    "TI  - No PMID or date\n\n"
+    "PMID- 3\nTI  - Third\nDP  - 2018\nMH  - Mice\nMH  - Humans\n"
+)
+
+
+def test_parse_table():
+    table = NBIBParser().parse_table(RECORDS.splitlines(keepends=True))
+    assert len(table) == 3
+    assert list(table.columns["PMID"]) == [1, MISSING, 3]
+    assert list(table.columns["year"]) == [2020, MISSING, 2018]
+    assert table.columns["title"] == ["First", "No PMID or date", "Third"]
+    assert table.columns["journal"] == ["Journal One", None, None]
+    assert table.columns["keywords"] == ["genes | cells", None, None]
+    assert table.columns["doi"] == ["10.1000/one", None, None]
+    assert table.columns["entry_type"] == ["article", "misc", "misc"]
+    assert table.multi_valued["FAU"].offsets.tolist() == [0, 2, 2, 2]
+    assert list(table.multi_valued["MH"]) == [["Humans"], [], ["Mice", "Humans"]]
+    assert table.row(0)["FAU"] == ["Smith, John", "Jones, Ann"]
+
+
+def test_fields_match_entries():
+    parser = NBIBParser(cache=None)
+    table = parser.parse_table(MARCELIS)
+    (key, entry), = parser.iter_entries(MARCELIS)
+    row = table.row(0)
+    for field in table.fields:
+        assert row[field] == entry.fields.get(field)
+    assert row["PMID"] == int(entry.fields["PMID"])
+    assert row["year"] == int(entry.fields["year"])
+    assert row["doi"] == entry.fields.get("doi")
+    assert row["type"] == entry.fields["type"]
+    assert len(row["FAU"]) == len(entry.persons["author"])
+
+
+def test_compressed_file(tmp_path):
+    path = tmp_path / "records.nbib.gz"
+    with gzip.open(path, "wt") as f:
+        f.write(RECORDS)
+    assert len(NBIBParser().parse_table(path)) == 3
+
+
+def test_selected_fields_and_codes(tmp_path):
+    path = tmp_path / "records.nbib"
+    path.write_text(RECORDS)
+    table = NBIBParser().parse_table(path, fields=["title"], multi_valued_codes=["MH"])
+    assert table.fields == ("title", "date")
+    assert "AB" not in table.codes and "abstract" not in table.columns
+    assert list(table.multi_valued) == ["MH"]
+    assert list(table.columns["year"]) == [2020, MISSING, 2018]
+
+
+def test_record_filter():
+    table = NBIBParser(record_filter=YearRange(2019, 2021)).parse_table(RECORDS.splitlines(keepends=True))
+    assert list(table.columns["PMID"]) == [1]
+
+
+def test_invalid_fields():
+    with pytest.raises(ValueError):
+        NBIBTable(fields=["title", "mesh"])
+
+
+def test_to_pandas():
+    pytest.importorskip("pandas")
+    table = NBIBParser().parse_table(RECORDS.splitlines(keepends=True))
+    frame = table.to_pandas()
+    assert frame["PMID"].isna().tolist() == [False, True, False]
+    assert frame["year"].dtype == "Int64"
+    assert frame["title"].tolist() == ["First", "No PMID or date", "Third"]
+
+    mesh = table.multi_valued_frame("MH")
+    assert mesh["row"].tolist() == [0, 2, 2]
+    assert mesh["PMID"].tolist() == [1, 3, 3]
+    assert mesh["MH"].tolist() == ["Humans", "Mice", "Humans"]
+
+
+def test_to_numpy():
+    pytest.importorskip("numpy")
+    arrays = NBIBParser().parse_table(RECORDS.splitlines(keepends=True)).to_numpy()
+    assert arrays["PMID"].tolist() == [1, MISSING, 3]
+    assert arrays["FAU_offsets"].tolist() == [0, 2, 2, 2]
+    assert arrays["FAU"].tolist() == ["Smith, John", "Jones, Ann"]
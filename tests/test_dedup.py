@@ -0,0 +1,95 @@
+import pytest
+from pybtex.database import BibliographyData, Entry, Person
+
+from pybtexnbib import NBIBParser
+from pybtexnbib.dedup import Deduplicator, get_revision
+
+from .test_parsers import record
+
+
+def test_keep_first():
+    parser = NBIBParser(deduplicate="keep-first")
+    parser.parse_string(record("1", "First", lr="20200101") + record("2", "Other", author="Jones, Ann"))
+    parser.parse_string(record("1", "Second", lr="20210101"))
+    assert list(parser.data.entries.keys()) == ["Smith2020", "Jones2020"]
+    assert parser.data.entries["Smith2020"].fields["title"] == "First"
+    assert parser.deduplicator.duplicates == 1
+
+
+def test_keep_latest():
+    parser = NBIBParser(deduplicate="keep-latest")
+    parser.parse_string(
+        record("1", "First", lr="20200101")
+        + record("1", "Latest", lr="20220101")
+        + record("1", "Older", lr="20210101")
+    )
+    assert list(parser.data.entries.keys()) == ["Smith2020"]
+    entry = parser.data.entries["Smith2020"]
+    assert entry.fields["title"] == "Latest"
+    assert entry.key == "Smith2020"
+
+
+def test_union_by_doi():
+    parser = NBIBParser(deduplicate="union")
+    parser.parse_string(
+        record("1", "First", doi="10.1000/ABC")
+        + record("2", "Second", doi="10.1000/abc", author="Jones, Ann", extra="AB  - An abstract")
+    )
+    assert list(parser.data.entries.keys()) == ["Smith2020"]
+    entry = parser.data.entries["Smith2020"]
+    assert entry.fields["title"] == "First"
+    assert entry.fields["abstract"] == "An abstract"
+
+
+def test_callable_policy():
+    parser = NBIBParser(deduplicate=lambda existing, duplicate: duplicate)
+    parser.parse_string(record("1", "First") + record("1", "Second"))
+    assert parser.data.entries["Smith2020"].fields["title"] == "Second"
+
+
+def test_lazy_entries():
+    parser = NBIBParser(deduplicate="keep-first", lazy=True)
+    parser.parse_string(record("1", "First") + record("1", "Second"))
+    assert list(parser.data.entries.keys()) == ["Smith2020"]
+
+
+def test_parse_files(tmp_path):
+    first = tmp_path / "first.nbib"
+    second = tmp_path / "second.nbib"
+    first.write_text(record("1", "First") + record("2", "Other", author="Jones, Ann"), encoding="utf-8")
+    second.write_text(
+        record("2", "Repeated", author="Jones, Ann") + record("3", "Third", author="Brown, Bob"), encoding="utf-8"
+    )
+    parser = NBIBParser(deduplicate="keep-first")
+    result = parser.parse_files([first, second], jobs=2, threads=True)
+    assert list(result.entries.keys()) == ["Smith2020", "Jones2020", "Brown2020"]
+    assert result.entries["Jones2020"].fields["title"] == "Other"
+
+
+def test_without_identifiers():
+    deduplicator = Deduplicator()
+    data = BibliographyData()
+    deduplicator.add_entry(data, "a", Entry("misc", fields={"title": "A"}))
+    deduplicator.add_entry(data, "b", Entry("misc", fields={"title": "B"}))
+    assert list(data.entries.keys()) == ["a", "b"]
+    assert deduplicator.duplicates == 0
+
+
+def test_union_persons():
+    deduplicator = Deduplicator("union")
+    data = BibliographyData()
+    deduplicator.add_entry(data, "a", Entry("misc", fields={"PMID": "1"}))
+    deduplicator.add_entry(data, "b", Entry("misc", fields={"PMID": "1"}, persons={"author": [Person("Smith, John")]}))
+    assert list(data.entries.keys()) == ["a"]
+    assert data.entries["a"].persons["author"] == [Person("Smith, John")]
+
+
+def test_get_revision():
+    assert get_revision(Entry("misc", fields={"DRDT": "20190404"})) == "20190404"
+    assert get_revision(Entry("misc", fields={"LR": "20200101", "DRDT": "20190404"})) == "20200101"
+    assert get_revision(Entry("misc")) == ""
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        Deduplicator("keep-best")
@@ -0,0 +1,179 @@
+import asyncio
+import pickle
+import warnings
+
+import pytest
+import pybtex.errors
+
+from pybtexnbib import NBIBParser
+from pybtexnbib.diagnostics import Diagnostic, Diagnostics, NBIBSyntaxError, INVALID_LINE
+from pybtexnbib.tokenizer import tokenize, tokenize_buffer
+
+DIRTY = (
+    "Exported from somewhere\nPMID- 1\nTI  - First\nFAU - Smith, John\nDP  - 2020\n\n"
+    "stray text\nPMID- 2\nTI  - Second\nFAU - Jones, Ann\nDP  - 2020\n"
+)
+
+
+def test_lenient_is_default():
+    parser = NBIBParser()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        data = parser.parse_string(DIRTY)
+    assert list(data.entries) == ["Smith2020", "Jones2020"]
+    diagnostics = parser.diagnostics
+    assert diagnostics.mode == "lenient"
+    assert diagnostics.counts == {INVALID_LINE: 2}
+    assert [(d.line_number, d.record_index, d.text) for d in diagnostics.diagnostics] == [
+        (1, 0, "Exported from somewhere"),
+        (7, 1, "stray text"),
+    ]
+
+
+def test_buffer_line_numbers():
+    diagnostics = Diagnostics()
+    records = list(tokenize_buffer(DIRTY.encode(), diagnostics=diagnostics))
+    assert len(records) == 2
+    assert [(d.line_number, d.record_index) for d in diagnostics.diagnostics] == [(1, 0), (7, 1)]
+
+
+def test_tokenize_without_diagnostics_warns():
+    with pytest.warns(UserWarning, match="stray text"):
+        list(tokenize(DIRTY.splitlines()))
+
+
+def test_silent():
+    parser = NBIBParser(diagnostics="silent")
+    parser.parse_string(DIRTY)
+    assert parser.diagnostics.counts == {INVALID_LINE: 2}
+    assert parser.diagnostics.diagnostics == []
+    assert parser.diagnostics.dropped == 2
+
+
+def test_cap():
+    diagnostics = Diagnostics(max_diagnostics=1)
+    NBIBParser(diagnostics=diagnostics).parse_string(DIRTY)
+    assert diagnostics.total == 2
+    assert len(diagnostics.diagnostics) == 1
+    assert diagnostics.dropped == 1
+    assert diagnostics.summary().endswith("... and 1 more")
+
+
+def test_strict_raises():
+    with pytest.raises(NBIBSyntaxError, match="line 1: Invalid line"):
+        NBIBParser(diagnostics="strict").parse_string(DIRTY)
+
+
+def test_strict_pybtex_capture():
+    parser = NBIBParser(diagnostics="strict")
+    with pybtex.errors.capture() as errors:
+        parser.parse_string(DIRTY)
+    assert len(parser.data.entries) == 2
+    assert [error.diagnostic.line_number for error in errors] == [1, 7]
+
+
+def test_strict_handle_error_override():
+    errors = []
+
+    class CollectingParser(NBIBParser):
+        def handle_error(self, error):
+            errors.append(error)
+
+    CollectingParser(diagnostics="strict").parse_string(DIRTY)
+    assert [str(error) for error in errors] == [
+        "line 1: Invalid line before the first tag of a record: 'Exported from somewhere'",
+        "line 7: Invalid line before the first tag of a record: 'stray text'",
+    ]
+
+
+def test_invalid_mode():
+    with pytest.raises(ValueError):
+        NBIBParser(diagnostics="loud")
+
+
+def test_file_filename(tmp_path):
+    path = tmp_path / "dirty.nbib"
+    path.write_text(DIRTY)
+    parser = NBIBParser(cache=None)
+    parser.parse_file(str(path))
+    assert [str(d) for d in parser.diagnostics.diagnostics][0].startswith(f"{path}: line 1: ")
+    assert parser.diagnostics.filename is None
+
+
+def test_file_workers(tmp_path, monkeypatch):
+    path = tmp_path / "dirty.nbib"
+    path.write_text((DIRTY + "\n") * 3)
+    monkeypatch.setattr(NBIBParser, "file_chunk_size", 10)
+    parser = NBIBParser(cache=None, workers=2)
+    entries = list(parser.iter_entries(str(path)))
+    assert len(entries) == 6
+    assert [(d.line_number, d.record_index) for d in parser.diagnostics.diagnostics] == [
+        (1, 0), (7, 1), (13, 2), (19, 3), (25, 4), (31, 5)
+    ]
+    assert {d.filename for d in parser.diagnostics.diagnostics} == {str(path)}
+
+
+def test_parse_files_threads(tmp_path):
+    paths = []
+    for number in range(2):
+        path = tmp_path / f"{number}.nbib"
+        path.write_text(
+            DIRTY.replace("PMID- ", f"PMID- {number}")
+            .replace("Smith", f"Smith{number}")
+            .replace("Jones", f"Jones{number}")
+        )
+        paths.append(str(path))
+    parser = NBIBParser(cache=None)
+    parser.parse_files(paths, jobs=2, threads=True)
+    assert parser.diagnostics.total == 4
+    assert [d.filename for d in parser.diagnostics.diagnostics] == [paths[0], paths[0], paths[1], paths[1]]
+
+
+def test_aparse():
+    async def chunks():
+        yield DIRTY
+
+    parser = NBIBParser()
+    asyncio.run(parser.aparse(chunks()))
+    assert parser.diagnostics.total == 2
+
+
+def test_pickle_and_extend():
+    worker = Diagnostics(handle_error=lambda error: None)
+    worker.report(INVALID_LINE, "Bad", line_number=2, record_index=0)
+    worker = pickle.loads(pickle.dumps(worker))
+
+    diagnostics = Diagnostics()
+    diagnostics.extend(worker, line_offset=10, record_offset=3)
+    assert diagnostics.diagnostics == [Diagnostic(INVALID_LINE, "Bad", 12, 3)]
+    assert diagnostics.counts == {INVALID_LINE: 1}
+    diagnostics.clear()
+    assert not diagnostics
+    assert diagnostics.summary() == "No problems found."
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_cached_file_diagnostics(tmp_path, jobs):
+    from pybtexnbib import NBIBCache
+
+    paths = []
+    for number in range(2):
+        path = tmp_path / f"{number}.nbib"
+        path.write_text(DIRTY.replace("Smith", f"Smith{number}").replace("Jones", f"Jones{number}"))
+        paths.append(str(path))
+    cache = NBIBCache(tmp_path / "cache")
+    for _ in range(2):
+        parser = NBIBParser(cache=cache)
+        parser.parse_files(paths, jobs=jobs)
+        assert parser.diagnostics.counts == {INVALID_LINE: 4}
+        assert [d.filename for d in parser.diagnostics.diagnostics] == [paths[0], paths[0], paths[1], paths[1]]
+    assert cache.statistics.hits == 2
+
+    for _ in range(2):
+        with pytest.raises(NBIBSyntaxError):
+            NBIBParser(cache=cache, diagnostics="strict").parse_files(paths, jobs=jobs)
+    assert cache.statistics.hits == 3
+
+
+def test_options_signature_includes_mode():
+    assert NBIBParser().options_signature() != NBIBParser(diagnostics="strict").options_signature()
@@ -0,0 +1,65 @@
+import pickle
+from pathlib import Path
+from pybtex.database import Entry
+from pybtex.plugin import find_plugin
+from pybtexnbib import NBIBParser, PersonCache
+from pybtexnbib.entries import LazyEntry
+
+from .test_parsers import TestMarcelis, TestSingleBookChapter, marcelis
+from .test_format import marcelis as marcelis_formatted
+
+files_dir = Path(__file__).parent / "files"
+
+
+def test_lazy_entry_equals_entry():
+    for input_string in [TestMarcelis.input_string, TestSingleBookChapter.input_string]:
+        eager_key, eager_entry = NBIBParser().process_entry(input_string)
+        lazy_key, lazy_entry = NBIBParser(lazy=True).process_entry(input_string)
+        assert isinstance(lazy_entry, LazyEntry)
+        assert isinstance(lazy_entry, Entry)
+        assert lazy_key == eager_key
+        assert lazy_entry == eager_entry
+        assert list(lazy_entry.fields.keys()) == list(eager_entry.fields.keys())
+        assert lazy_entry.is_materialized
+
+
+def test_lazy_entry_fields_do_not_build_persons():
+    person_cache = PersonCache()
+    _, entry = NBIBParser(lazy=True, person_cache=person_cache).process_entry(TestSingleBookChapter.input_string)
+
+    # Only the first author is parsed to build the key
+    assert person_cache.info().misses == 1
+    assert entry.fields["PMID"] == "20301770"
+    assert entry.fields["year"] == "1993"
+    assert person_cache.info().misses == 1
+    assert not entry.is_materialized
+
+    assert len(entry.persons["editor"]) == 8
+    assert person_cache.info().misses == 10
+    assert entry.is_materialized
+
+
+def test_lazy_parse_file_and_format():
+    parser = NBIBParser(lazy=True)
+    data = parser.parse_file(files_dir / "marcelis-20301770.nbib")
+    assert data == marcelis
+
+    style = find_plugin('pybtex.style.formatting', 'plain')()
+    backend = find_plugin('pybtex.backends', 'plaintext')()
+    formatted = style.format_bibliography(data)
+    assert "".join(f"[{entry.label}] {entry.text.render(backend)}\n" for entry in formatted) == marcelis_formatted
+
+
+def test_lazy_entry_pickle_and_lower():
+    _, entry = NBIBParser(lazy=True).process_entry(TestSingleBookChapter.input_string)
+    unpickled = pickle.loads(pickle.dumps(entry))
+    assert unpickled == marcelis.entries["Marcelis1993"]
+    assert entry.lower() == marcelis.entries["Marcelis1993"].lower()
+
+
+def test_lazy_entry_setters():
+    _, entry = NBIBParser(lazy=True).process_entry(TestSingleBookChapter.input_string)
+    entry.fields = {"title": "Replaced"}
+    assert entry.fields["title"] == "Replaced"
+    entry.persons = {}
+    assert entry.is_materialized
@@ -20,3 +20,9 @@ def test_database_input_suffixes():
 
     assert len(nbib_entry_points) == 1
     assert nbib_entry_points[0].load() == NBIBParser
+
+def test_database_input_compressed_suffixes():
+    hook = "pybtex.database.input.suffixes"
+    entry_points = {entry_point.name: entry_point for entry_point in pkg_resources.iter_entry_points(hook)}
+    for suffix in [".nbib.gz", ".nbib.bz2", ".nbib.xz"]:
+        assert entry_points[suffix].load() == NBIBParser
@@ -0,0 +1,85 @@
+import pickle
+from pybtexnbib import NBIBParser, NBIBIndex
+from pybtexnbib.filters import YearRange, PublicationType, Language, PMIDs, AllOf, AnyOf
+from pybtexnbib.persons import PersonCache
+
+records = """
+PMID- 1
+DP  - 2014 Dec
+LA  - eng
+PT  - Journal Article
+FAU - One, Author
+
+PMID- 2
+DP  - 2016
+LA  - ger
+PT  - Journal Article
+FAU - Two, Author
+
+PMID- 3
+DP  - 2020 Jan-Feb
+LA  - eng
+PT  - Review
+FAU - Three, Author
+
+PMID- 4
+LA  - eng
+PT  - Journal Article
+FAU - Four, Author
+"""
+
+
+def pmids(record_filter, **kwargs):
+    data = NBIBParser(record_filter=record_filter, **kwargs).parse_string(records)
+    return [entry.fields["PMID"] for entry in data.entries.values()]
+
+
+def test_year_range():
+    assert pmids(YearRange(2015, 2020)) == ["2", "3"]
+    assert pmids(YearRange(start=2016)) == ["2", "3"]
+    assert pmids(YearRange(end=2016)) == ["1", "2"]
+
+
+def test_publication_type():
+    assert pmids(PublicationType("Journal Article")) == ["1", "2", "4"]
+    assert pmids(PublicationType("Review", "Letter")) == ["3"]
+
+
+def test_language():
+    assert pmids(Language("ENG")) == ["1", "3", "4"]
+
+
+def test_pmids():
+    assert pmids(PMIDs([2, "4", 5])) == ["2", "4"]
+
+
+def test_combined():
+    assert pmids(AllOf(Language("eng"), PublicationType("Journal Article"))) == ["1", "4"]
+    assert pmids(AnyOf(PMIDs({1}), YearRange(2020))) == ["1", "3"]
+    assert pmids(lambda nbib_dict: "FAU" in nbib_dict and nbib_dict["PMID"] == ["4"]) == ["4"]
+
+
+def test_rejected_records_skip_person_parsing():
+    person_cache = PersonCache()
+    assert pmids(PMIDs({3}), person_cache=person_cache) == ["3"]
+    assert person_cache.info().misses == 1
+
+
+def test_filters_with_workers():
+    record_filter = AllOf(Language("eng"), YearRange(2015))
+    assert pickle.loads(pickle.dumps(record_filter)) == record_filter
+    assert pmids(record_filter, workers=2, chunk_size=1) == ["3"]
+
+
+def test_filter_repr_is_stable():
+    assert repr(PMIDs({"2", "1"})) == repr(PMIDs(["1", "2"])) == "PMIDs(('1', '2'))"
+    assert repr(PublicationType("b", "a")) == "PublicationType(types=('a', 'b'))"
+
+
+def test_index_with_filter(tmp_path):
+    path = tmp_path / "records.nbib"
+    path.write_text(records, encoding="utf-8")
+    index = NBIBIndex(path, parser=NBIBParser(record_filter=Language("eng")))
+    assert index.get("1").fields["PMID"] == "1"
+    assert index.get("2") is None
+    assert index.get_by_number(1) is None
@@ -0,0 +1,99 @@
+import os
+import shutil
+from pathlib import Path
+import pytest
+from pybtexnbib import NBIBIndex, NBIBParser
+from pybtexnbib.diagnostics import INVALID_LINE, NBIBSyntaxError
+
+from .test_parsers import marcelis
+
+files_dir = Path(__file__).parent / "files"
+
+multiple_records = """PMID- 111
+TI  - First Title
+DP  - 2020
+AID - 10.1000/ABC [doi]
+
+PMID- 222
+TI  - Second Title
+DP  - 2021
+AID - 222 [pii]
+AID - 10.1000/def [doi]
+ER  -
+PMID- 333
+TI  - Third Title
+DP  - 2022
+"""
+
+
+def test_index_get(tmp_path):
+    path = tmp_path / "multiple.nbib"
+    path.write_text(multiple_records, encoding="utf-8")
+    index = NBIBIndex(path)
+    assert len(index) == 3
+    assert index.index_path == tmp_path / "multiple.nbib.idx"
+    assert index.index_path.exists()
+    assert "222" in index
+    assert index.get("222").fields["title"] == "Second Title"
+    assert index.get(333).fields["title"] == "Third Title"
+    assert index.get("999") is None
+    assert index.get_by_doi("10.1000/abc").fields["PMID"] == "111"
+    assert index.get_by_doi("10.1000/DEF").fields["PMID"] == "222"
+    key, entry = index.get_by_number(0)
+    assert key == "First.Title2020"
+
+
+def test_index_loads_sidecar(tmp_path, monkeypatch):
+    path = tmp_path / "marcelis.nbib"
+    shutil.copy(files_dir / "marcelis-20301770.nbib", path)
+    NBIBIndex(path)
+
+    def fail_build(self):
+        raise AssertionError("The index should be loaded from the sidecar file.")
+
+    monkeypatch.setattr(NBIBIndex, "build", fail_build)
+    index = NBIBIndex(path)
+    assert index.get("20301770") == marcelis.entries["Marcelis1993"]
+
+
+def test_index_rebuilds_when_stale(tmp_path):
+    path = tmp_path / "multiple.nbib"
+    path.write_text(multiple_records, encoding="utf-8")
+    index = NBIBIndex(path)
+    assert index.get("444") is None
+
+    path.write_text(multiple_records + "\nPMID- 444\nTI  - Fourth Title\n", encoding="utf-8")
+    os.utime(path, ns=(0, 0))
+    assert index.get("444").fields["title"] == "Fourth Title"
+    assert len(NBIBIndex(path)) == 4
+
+
+def test_index_custom_parser(tmp_path):
+    path = tmp_path / "multiple.nbib"
+    path.write_text(multiple_records, encoding="latin-1")
+    index = NBIBIndex(path, index_path=tmp_path / "custom.idx", parser=NBIBParser(encoding="latin-1"))
+    assert (tmp_path / "custom.idx").exists()
+    assert index.get("111").fields["doi"] == "10.1000/ABC"
+
+
+def test_index_every_doi(tmp_path):
+    path = tmp_path / "dois.nbib"
+    path.write_text("PMID- 1\nTI  - Title\nAID - 10.1000/first [doi]\nAID - 10.1000/last [doi]\n", encoding="utf-8")
+    index = NBIBIndex(path)
+    entry = index.get("1")
+    assert index.get_by_doi(entry.fields["doi"]) == entry
+    assert index.get_by_doi("10.1000/first") == entry
+    assert NBIBIndex(path).get_by_doi("10.1000/LAST") == entry
+
+
+def test_index_diagnostics(tmp_path):
+    path = tmp_path / "dirty.nbib"
+    path.write_text("Exported from somewhere\n" + multiple_records, encoding="utf-8")
+    parser = NBIBParser()
+    index = NBIBIndex(path, parser=parser)
+    assert parser.diagnostics.counts == {INVALID_LINE: 1}
+    assert parser.diagnostics.diagnostics[0].filename == str(path)
+    assert index.get("111").fields["title"] == "First Title"
+
+    with pytest.raises(NBIBSyntaxError):
+        NBIBIndex(path, index_path=tmp_path / "strict.idx", parser=NBIBParser(diagnostics="strict"))
@@ -0,0 +1,109 @@
+import pickle
+
+import pybtex.errors
+import pytest
+from pybtex.utils import OrderedCaseInsensitiveDict
+
+from pybtexnbib import NBIBParser
+from pybtexnbib.keys import KeyTable, key_suffix
+
+from .test_parsers import record
+
+
+def test_author_year_is_default():
+    parser = NBIBParser()
+    parser.parse_string(record("1"))
+    assert list(parser.data.entries) == ["Smith2020"]
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_pmid_keys(lazy):
+    parser = NBIBParser(key_strategy="pmid", lazy=lazy)
+    parser.parse_string(record("1") + record("2") + record(None, author="Jones, Ann"))
+    assert list(parser.data.entries) == ["pmid1", "pmid2", "Jones2020"]
+
+
+def test_doi_keys():
+    parser = NBIBParser(key_strategy="doi")
+    parser.parse_string(record("1", doi="10.1000/ABC (1), x") + record("2"))
+    assert list(parser.data.entries) == ["10.1000/ABC_(1)__x", "Smith2020"]
+
+
+def test_callable_key_strategy():
+    parser = NBIBParser(key_strategy=lambda entry: "key" + entry.fields["PMID"])
+    parser.parse_string(record("7"))
+    assert list(parser.data.entries) == ["key7"]
+
+
+def test_invalid_key_strategy():
+    with pytest.raises(ValueError):
+        NBIBParser(key_strategy="title")
+
+
+def test_repeated_keys_without_unique_keys():
+    parser = NBIBParser()
+    with pybtex.errors.capture() as errors:
+        parser.parse_string(record("1") + record("2"))
+    assert list(parser.data.entries) == ["Smith2020"]
+    assert len(errors) == 1
+
+
+def test_unique_keys():
+    parser = NBIBParser(unique_keys=True)
+    parser.parse_string("".join(record(str(number)) for number in range(30)))
+    keys = list(parser.data.entries)
+    assert keys[:4] == ["Smith2020", "Smith2020a", "Smith2020b", "Smith2020c"]
+    assert keys[-3:] == ["Smith2020aa", "Smith2020ab", "Smith2020ac"]
+    assert [entry.fields["PMID"] for entry in parser.data.entries.values()] == [str(number) for number in range(30)]
+
+    # The counters carry on across files parsed by the same parser
+    parser.parse_string(record("30"))
+    assert list(parser.data.entries)[-1] == "Smith2020ad"
+
+
+def test_unique_keys_workers():
+    parser = NBIBParser(unique_keys=True, workers=2, chunk_size=2)
+    parser.parse_string("".join(record(str(number)) for number in range(5)))
+    assert list(parser.data.entries) == ["Smith2020", "Smith2020a", "Smith2020b", "Smith2020c", "Smith2020d"]
+
+
+def test_unique_keys_with_deduplication():
+    parser = NBIBParser(unique_keys=True, deduplicate="keep-first")
+    parser.parse_string(record("1") + record("1") + record("2"))
+    assert list(parser.data.entries) == ["Smith2020", "Smith2020a"]
+    assert parser.data.entries["Smith2020a"].fields["PMID"] == "2"
+
+
+def test_key_table():
+    table = KeyTable()
+    entries = OrderedCaseInsensitiveDict({"Smith2020a": None})
+    assert table.unique_key("Smith2020", entries) == "Smith2020"
+    entries["Smith2020"] = None
+    # 'Smith2020a' is taken so the next suffix is used
+    assert table.unique_key("SMITH2020", entries) == "SMITH2020b"
+    assert table.counts == {"smith2020": 2}
+    table.clear()
+    assert table.counts == {}
+
+
+def test_key_suffix():
+    assert [key_suffix(number) for number in (1, 2, 26, 27, 52, 53, 702, 703)] == [
+        "a", "b", "z", "aa", "az", "ba", "zz", "aaa"
+    ]
+
+
+def test_options_signature_includes_key_strategy():
+    assert NBIBParser().options_signature() != NBIBParser(key_strategy="pmid").options_signature()
+    pickle.dumps(NBIBParser(key_strategy="pmid")._worker_arguments)
+
+
+def test_author_year_keys_match_pybtexris():
+    from pybtexris.parsers import get_entry_key
+
+    parser = NBIBParser()
+    parser.parse_string(
+        record("1", author="Müller-Lüdenscheidt, Jörg") + record("2", author="van der Berg, Ann", year="2019")
+    )
+    parser.parse_string("PMID- 3\nTI  - A title without any authors at all\nDP  - 2021\n\n")
+    for key, entry in parser.data.entries.items():
+        assert key == get_entry_key(entry)
@@ -0,0 +1,80 @@
+from pybtexnbib import NBIBParser
+from pybtexnbib.mapping import COMPILED_MAPPING_PATH, NBIBMapping, compile_mapping, default_mapping
+
+from .test_parsers import TestSingleBookChapter, MultipleRecordsTest, marcelis
+
+record = """
+PMID- 1
+TI  - Title
+DP  - 2020
+MH  - Humans
+MH  - Mice
+PT  - Letter
+FAU - Smith, Jane
+"""
+
+
+def test_default_mapping_loaded_once():
+    assert default_mapping() is default_mapping()
+    assert NBIBParser().mapping is NBIBParser().mapping
+    assert default_mapping().types["Journal Article"] == "article"
+    assert ("FAU", "author") in default_mapping().persons
+    assert ("OT", "keywords", " | ") in default_mapping().fields
+
+
+def test_field_order():
+    _, entry = NBIBParser().process_entry(TestSingleBookChapter.input_string)
+    expected = marcelis.entries["Marcelis1993"]
+    assert list(entry.fields.keys()) == list(expected.fields.keys())
+
+
+def test_updated_mapping_with_dicts():
+    mapping = default_mapping().updated(
+        types={"Letter": "article"},
+        persons={"FAU": "editor"},
+        fields={"MH": ("mesh", " | "), "TI": None},
+    )
+    assert default_mapping().types.get("Letter") is None
+
+    key, entry = NBIBParser(mapping=mapping).process_entry(record)
+    assert entry.type == "article"
+    assert entry.fields["mesh"] == "Humans | Mice"
+    assert entry.fields["TI"] == "Title"
+    assert "title" not in entry.fields
+    assert [str(person) for person in entry.persons["editor"]] == ["Smith, Jane"]
+
+
+def test_updated_mapping_with_csv(tmp_path):
+    fields_path = tmp_path / "fields.csv"
+    fields_path.write_text('NBIB Code,bibtex,delimiter\nMH,mesh," | "\nPMID,pmid,\n', encoding="utf-8")
+    mapping = default_mapping().updated(fields=fields_path)
+
+    _, entry = NBIBParser(mapping=mapping).process_entry(record)
+    assert entry.fields["mesh"] == "Humans | Mice"
+    assert entry.fields["pmid"] == "1"
+    assert entry.fields["title"] == "Title"
+
+
+def test_mapping_from_csv(tmp_path):
+    types_path = tmp_path / "types.csv"
+    types_path.write_text('Publication Type,bibtex\nLetter,misc\n', encoding="utf-8")
+    mapping = NBIBMapping.from_csv(types_path=types_path)
+    assert mapping.types == {"Letter": "misc"}
+    assert mapping.fields == default_mapping().fields
+    assert mapping != default_mapping()
+
+
+def test_mapping_used_by_workers():
+    mapping = default_mapping().updated(fields={"PMID": "pmid"})
+    parser = NBIBParser(mapping=mapping, workers=2, chunk_size=1)
+    data = parser.parse_string(MultipleRecordsTest.input_string)
+    assert [entry.fields["pmid"] for entry in data.entries.values()] == ["1", "2", "3"]
+
+
+def test_compiled_mapping_matches_csv(tmp_path):
+    # Run `python -m pybtexnbib.mapping` if this fails after changing the CSV files
+    assert default_mapping() == NBIBMapping.from_csv()
+
+    path = tmp_path / "mapping_data.py"
+    compile_mapping(path)
+    assert path.read_text(encoding="utf-8") == COMPILED_MAPPING_PATH.read_text(encoding="utf-8")
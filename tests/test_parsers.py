@@ -1,6 +1,11 @@
+import bz2
+import gzip
+import io
+import lzma
+import pytest
 from unittest import TestCase
 from itertools import zip_longest
-from pybtex.database import BibliographyData, Entry, Person
+from pybtex.database import BibliographyData, BibliographyDataError, Entry, Person
 from pybtex.utils import OrderedCaseInsensitiveDict
 from pybtexnbib import NBIBParser
 from pathlib import Path
@@ -17,6 +22,18 @@ class _TestParser(NBIBParser):
         self.errors.append(error)
 
 
+def record(pmid, title="A title", author="Smith, John", year="2020", doi=None, lr=None, extra=""):
+    """ Returns the text of a record followed by a blank line. The PMID is left out if it is None. """
+    lines = [f"PMID- {pmid}" if pmid else None, f"TI  - {title}", f"DP  - {year}", f"FAU - {author}"]
+    if lr:
+        lines.append(f"LR  - {lr}")
+    if doi:
+        lines.append(f"AID - {doi} [doi]")
+    if extra:
+        lines.append(extra)
+    return "\n".join(line for line in lines if line) + "\n\n"
+
+
 marcelis = BibliographyData(
     entries=OrderedCaseInsensitiveDict(
         [
@@ -632,3 +649,262 @@ def test_parse_file():
     parser.parse_file(files_dir / "marcelis-20301770.nbib")
     result = parser.data
     assert result == marcelis
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_file_located_with_kpsewhich(monkeypatch, workers):
+    import pybtexnbib.parsers
+
+    searched = []
+
+    def kpsewhich(filename):
+        searched.append(filename)
+        return str(files_dir / "marcelis-20301770.nbib").encode()
+
+    monkeypatch.setattr(pybtexnbib.parsers, "kpsewhich", kpsewhich)
+    parser = _TestParser(workers=workers)
+    parser.parse_file("marcelis-20301770.nbib")
+    assert searched == ["marcelis-20301770.nbib"]
+    assert parser.data == marcelis
+
+
+class MultipleRecordsTest(ParserTest, TestCase):
+    input_string = """
+    PMID- 1
+    TI  - First Title
+    DP  - 2020
+    ER  -
+
+    PMID- 2
+    TI  - Second Title
+    DP  - 2021
+
+    PMID- 3
+    TI  - Third Title
+    DP  - 2022
+    """
+    correct_result = BibliographyData(
+        entries=OrderedCaseInsensitiveDict(
+            [
+                (
+                    'First.Title2020',
+                    Entry('misc', fields=[('title', 'First Title'), ('date', '2020'), ('year', '2020'), ('PMID', '1')]),
+                ),
+                (
+                    'Second.Title2021',
+                    Entry(
+                        'misc', fields=[('title', 'Second Title'), ('date', '2021'), ('year', '2021'), ('PMID', '2')]
+                    ),
+                ),
+                (
+                    'Third.Title2022',
+                    Entry('misc', fields=[('title', 'Third Title'), ('date', '2022'), ('year', '2022'), ('PMID', '3')]),
+                ),
+            ]
+        ),
+        preamble=[],
+    )
+
+
+class _LineStream:
+    """ A stream which can only be iterated over line by line. """
+
+    def __init__(self, text):
+        self.lines = text.splitlines(keepends=True)
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def read(self, *args):
+        raise AssertionError("The stream should not be read all at once.")
+
+
+def test_parse_stream_line_by_line():
+    parser = _TestParser()
+    with open(files_dir / "marcelis-20301770.nbib", encoding="utf-8") as f:
+        stream = _LineStream(f.read())
+    result = parser.parse_stream(stream)
+    assert result == marcelis
+
+
+def test_iter_entries_path():
+    parser = NBIBParser()
+    entries = list(parser.iter_entries(files_dir / "marcelis-20301770.nbib"))
+    assert entries == list(marcelis.entries.items())
+    assert len(parser.data.entries) == 0
+
+
+def test_iter_entries_stream():
+    parser = NBIBParser()
+    entries = parser.iter_entries(io.StringIO(MultipleRecordsTest.input_string))
+    key, entry = next(entries)
+    assert key == 'First.Title2020'
+    assert entry.fields['PMID'] == '1'
+    assert [key for key, _ in entries] == ['Second.Title2021', 'Third.Title2022']
+    assert len(parser.data.entries) == 0
+
+
+class ParallelMultipleRecordsTest(MultipleRecordsTest):
+    parser_options = dict(workers=2, chunk_size=1)
+
+
+def test_parse_file_parallel():
+    parser = NBIBParser(workers=2)
+    result = parser.parse_file(files_dir / "marcelis-20301770.nbib")
+    assert result == marcelis
+
+
+def test_parse_file_parallel_ranges(tmp_path):
+    path = tmp_path / "multiple.nbib"
+    path.write_text(MultipleRecordsTest.input_string, encoding="utf-8")
+    parser = NBIBParser(workers=2)
+    parser.file_chunk_size = 10
+    result = parser.parse_file(path)
+    assert result == MultipleRecordsTest.correct_result
+
+
+def test_parse_file_utf16(tmp_path):
+    path = tmp_path / "marcelis-utf16.nbib"
+    path.write_text((files_dir / "marcelis-20301770.nbib").read_text(encoding="utf-8"), encoding="utf-16")
+    parser = NBIBParser(encoding="utf-16")
+    result = parser.parse_file(path)
+    assert result == marcelis
+
+
+class CodesTest(ParserTest, TestCase):
+    parser_options = dict(codes={"PMID", "TI", "DP", "FAU"})
+    input_string = TestSingleBookChapter.input_string
+    correct_result = BibliographyData(
+        entries=OrderedCaseInsensitiveDict(
+            [
+                (
+                    'Marcelis1993',
+                    Entry(
+                        'misc',
+                        fields=[
+                            ('title', 'Feingold Syndrome 1.'),
+                            ('date', '1993'),
+                            ('year', '1993'),
+                            ('PMID', '20301770'),
+                        ],
+                        # The editors are read because the key falls back to them when there are no authors
+                        persons=OrderedCaseInsensitiveDict(
+                            [
+                                ('author', [Person('Marcelis, Carlo LM'), Person('de Brouwer, Arjan PM')]),
+                                (
+                                    'editor',
+                                    [
+                                        Person('Adam, Margaret P'),
+                                        Person('Ardinger, Holly H'),
+                                        Person('Pagon, Roberta A'),
+                                        Person('Wallace, Stephanie E'),
+                                        Person('Bean, Lora JH'),
+                                        Person('Gripp, Karen W'),
+                                        Person('Mirzaa, Ghayda M'),
+                                        Person('Amemiya, Anne'),
+                                    ],
+                                ),
+                            ]
+                        ),
+                    ),
+                )
+            ]
+        ),
+        preamble=[],
+    )
+
+
+def test_parse_file_codes():
+    parser = NBIBParser(codes={"PMID", "TI", "DP", "FAU"})
+    result = parser.parse_file(files_dir / "marcelis-20301770.nbib")
+    assert result == CodesTest.correct_result
+
+
+def test_codes_keep_codes_for_keys_filters_and_deduplication():
+    from pybtexnbib.filters import PublicationType
+
+    records = (
+        "PMID- 1\nTI  - First\nDP  - 2020\nFAU - Smith, John\nPT  - Journal Article\nAB  - One\nAID - 10.1/a [doi]\n\n"
+        "PMID- 2\nTI  - Second\nDP  - 2021\nFAU - Jones, Ann\nPT  - Journal Article\nAB  - Two\nAID - 10.1/a [doi]\n"
+    )
+    parser = NBIBParser(codes={"AB"})
+    assert list(parser.parse_string(records).entries) == ["Smith2020", "Jones2021"]
+
+    parser = NBIBParser(codes={"AB"}, key_strategy="pmid", record_filter=PublicationType("Journal Article"))
+    assert list(parser.parse_string(records).entries) == ["pmid1", "pmid2"]
+
+    parser = NBIBParser(codes={"AB"}, deduplicate="keep-first")
+    assert list(parser.parse_string(records).entries) == ["Smith2020"]
+
+
+def _write_batch_files(directory):
+    directory.mkdir()
+    (directory / "b.nbib").write_text(MultipleRecordsTest.input_string, encoding="utf-8")
+    (directory / "a.nbib").write_text(TestSingleBookChapter.input_string, encoding="utf-8")
+    (directory / "notes.txt").write_text("not an nbib file", encoding="utf-8")
+    return directory
+
+
+def _parse_files_serially(filenames):
+    parser = NBIBParser()
+    for filename in filenames:
+        parser.parse_file(filename)
+    return parser.data
+
+
+def test_parse_files_processes(tmp_path):
+    directory = _write_batch_files(tmp_path / "exports")
+    parser = NBIBParser()
+    result = parser.parse_files([directory], jobs=2)
+    assert list(result.entries.keys()) == ["Marcelis1993", "First.Title2020", "Second.Title2021", "Third.Title2022"]
+    assert result == _parse_files_serially([directory / "a.nbib", directory / "b.nbib"])
+    assert parser.file_errors == {}
+
+
+def test_parse_files_threads_errors(tmp_path):
+    directory = _write_batch_files(tmp_path / "exports")
+    missing = str(tmp_path / "missing.nbib")
+    parser = NBIBParser()
+    filenames = [directory / "b.nbib", missing, directory / "a.nbib"]
+    result = parser.parse_files(filenames, jobs=2, threads=True, skip_errors=True)
+    assert list(result.entries.keys()) == ["First.Title2020", "Second.Title2021", "Third.Title2022", "Marcelis1993"]
+    assert list(parser.file_errors) == [missing]
+    assert isinstance(parser.file_errors[missing], FileNotFoundError)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_parse_files_raises(tmp_path, jobs):
+    directory = _write_batch_files(tmp_path / "exports")
+    parser = NBIBParser()
+    with pytest.raises(FileNotFoundError):
+        parser.parse_files([directory / "b.nbib", tmp_path / "missing.nbib", directory / "a.nbib"], jobs=jobs)
+    assert list(parser.data.entries.keys()) == ["First.Title2020", "Second.Title2021", "Third.Title2022"]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_parse_files_repeated_keys(tmp_path, jobs):
+    directory = _write_batch_files(tmp_path / "exports")
+    parser = NBIBParser()
+    filenames = [directory / "a.nbib", directory / "a.nbib"]
+    with pytest.raises(BibliographyDataError):
+        parser.parse_files(filenames, jobs=jobs)
+    assert list(parser.data.entries.keys()) == ["Marcelis1993"]
+
+
+@pytest.mark.parametrize("suffix,opener", [(".gz", gzip.open), (".bz2", bz2.open), (".xz", lzma.open)])
+def test_parse_file_compressed(tmp_path, suffix, opener):
+    path = tmp_path / f"marcelis.nbib{suffix}"
+    with opener(path, "wb") as f:
+        f.write((files_dir / "marcelis-20301770.nbib").read_bytes())
+    result = NBIBParser(cache=None).parse_file(str(path))
+    assert result == marcelis
+
+
+def test_parse_files_directory_compressed(tmp_path):
+    directory = _write_batch_files(tmp_path / "exports")
+    with gzip.open(directory / "c.nbib.gz", "wt", encoding="utf-8") as f:
+        f.write("PMID- 4\nTI  - Compressed Title\nDP  - 2023\n")
+    result = NBIBParser().parse_files([directory], jobs=1)
+    assert list(result.entries.keys()) == [
+        "Marcelis1993", "First.Title2020", "Second.Title2021", "Third.Title2022", "Compressed.Title2023"
+    ]
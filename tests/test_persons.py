@@ -0,0 +1,51 @@
+import pickle
+from pybtex.database import Person
+from pybtexnbib import NBIBParser, PersonCache
+
+from .test_parsers import TestSingleBookChapter, marcelis
+
+
+def test_person_cache_matches_pybtex():
+    cache = PersonCache()
+    for name in ["de Brouwer, Arjan PM", "Dixit, Jr, Avinash K.", "Kolossváry, Márton", "Consortium"]:
+        assert cache.person(name) == Person(name)
+        assert cache.person(name) == Person(name)
+
+    info = cache.info()
+    assert info.hits == 4
+    assert info.misses == 4
+    assert cache.hit_rate == 0.5
+
+
+def test_person_cache_returns_new_objects():
+    cache = PersonCache()
+    first = cache.person("Smith, Jane")
+    first.last_names.append("Changed")
+    assert cache.person("Smith, Jane") == Person("Smith, Jane")
+
+
+def test_person_cache_bounded():
+    cache = PersonCache(maxsize=2)
+    for name in ["A, B", "C, D", "E, F", "A, B"]:
+        cache.person(name)
+    assert cache.info().currsize == 2
+    assert cache.info().hits == 0
+    cache.clear()
+    assert cache.info().currsize == 0
+
+
+def test_person_cache_pickle():
+    cache = pickle.loads(pickle.dumps(PersonCache(maxsize=10)))
+    assert cache.maxsize == 10
+    assert cache.person("Smith, Jane") == Person("Smith, Jane")
+
+
+def test_parser_person_cache():
+    cache = PersonCache()
+    parser = NBIBParser(person_cache=cache)
+    parser.parse_string(TestSingleBookChapter.input_string)
+    assert parser.data == marcelis
+    assert cache.info().misses == 10
+
+    NBIBParser(person_cache=cache).parse_string(TestSingleBookChapter.input_string)
+    assert cache.info().hits == 10
@@ -0,0 +1,30 @@
+from benchmarks.startup import LAZY_MODULES, import_time
+
+# The most time that importing the parser may take on top of pybtex's own imports
+IMPORT_TIME_BUDGET = 0.04
+
+
+def test_lazy_modules_not_imported():
+    _, modules = import_time()
+    imported = [
+        module for module in modules if any(module == lazy or module.startswith(lazy + ".") for lazy in LAZY_MODULES)
+    ]
+    assert imported == []
+
+
+def test_import_time_budget():
+    seconds = min(import_time()[0] for _ in range(3))
+    assert seconds < IMPORT_TIME_BUDGET
+
+
+def test_lazy_package_attributes():
+    import pybtexnbib
+
+    assert "NBIBWriter" in dir(pybtexnbib)
+    assert pybtexnbib.NBIBWriter.__name__ == "NBIBWriter"
+    try:
+        pybtexnbib.Missing
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("Missing attributes should raise AttributeError")
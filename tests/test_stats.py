@@ -0,0 +1,93 @@
+from pathlib import Path
+
+from pybtexnbib import NBIBParser, ParseStatistics
+from pybtexnbib.stats import STAGES
+
+from .test_parsers import record
+
+files_dir = Path(__file__).parent / "files"
+# A title on two lines
+TITLE = "A title\n      continued"
+
+
+def test_stats_off_by_default():
+    parser = NBIBParser()
+    assert parser.stats is None
+    parser.parse_string(record("1", TITLE))
+    assert parser.stats is None
+
+
+def test_stats_string():
+    parser = NBIBParser(stats=True)
+    parser.parse_string(record("1", TITLE) + record("2", TITLE, author="Jones, Ann"))
+    stats = parser.stats
+    assert isinstance(stats, ParseStatistics)
+    assert stats.records == 2
+    assert stats.rejected == 0
+    assert stats.lines == 12
+    assert stats.bytes_read > 0
+    assert set(stats.stage_seconds) == {"tokenize", "group", "type", "fields", "persons", "key", "add"}
+    assert stats.total_seconds > 0
+    assert sorted(key for _, key in stats.slowest_records()) == ["Jones2020", "Smith2020"]
+
+
+def test_stats_file():
+    parser = NBIBParser(stats=True)
+    parser.parse_file(files_dir / "marcelis-20301770.nbib")
+    path = files_dir / "marcelis-20301770.nbib"
+    assert parser.stats.records == 1
+    assert parser.stats.bytes_read == path.stat().st_size
+    assert parser.stats.lines == path.read_bytes().count(b"\n")
+
+
+def test_stats_filter_rejected():
+    parser = NBIBParser(stats=True, record_filter=lambda record: record["PMID"] == ["1"])
+    parser.parse_string(record("1", TITLE) + record("2", TITLE, author="Jones, Ann"))
+    assert parser.stats.records == 1
+    assert parser.stats.rejected == 1
+    assert "filter" in parser.stats.stage_seconds
+
+
+def test_stats_callback_and_slowest():
+    calls = []
+    stats = ParseStatistics(slowest_count=2, callback=lambda key, seconds, stages: calls.append((key, stages)))
+    parser = NBIBParser(stats=stats)
+    assert parser.stats is stats
+    parser.parse_string("".join(record(str(number), TITLE, author=f"Author{number}, Ann") for number in range(5)))
+    assert [key for key, _ in calls] == [f"Author{number}2020" for number in range(5)]
+    assert set(calls[0][1]) == {"group", "type", "fields", "persons", "key"}
+    assert len(stats.slowest_records()) == 2
+    seconds = [seconds for seconds, _ in stats.slowest_records()]
+    assert seconds == sorted(seconds, reverse=True)
+
+
+def test_stats_lazy():
+    parser = NBIBParser(stats=True, lazy=True)
+    parser.parse_string(record("1", TITLE))
+    assert parser.stats.records == 1
+    assert "persons" not in parser.stats.stage_seconds
+    assert "key" in parser.stats.stage_seconds
+
+
+def test_stats_workers():
+    parser = NBIBParser(stats=True, workers=2, chunk_size=2)
+    parser.parse_string("".join(record(str(number), TITLE, author=f"Author{number}, Ann") for number in range(5)))
+    assert len(parser.data.entries) == 5
+    assert parser.stats.records == 5
+    assert parser.stats.lines == 30
+    assert set(parser.stats.stage_seconds) == {"tokenize", "add"}
+
+
+def test_report_and_clear():
+    parser = NBIBParser(stats=True)
+    parser.parse_string(record("1", TITLE))
+    report = parser.stats.report()
+    assert report.startswith("1 records (0 rejected), 6 lines")
+    stage_lines = [line.split()[0] for line in report.splitlines()[1:] if not line.strip().startswith("slowest")]
+    assert stage_lines == [stage for stage in STAGES if stage in parser.stats.stage_seconds]
+    assert "slowest: Smith2020" in report
+
+    parser.stats.clear()
+    assert parser.stats.records == parser.stats.lines == parser.stats.bytes_read == 0
+    assert parser.stats.stage_seconds == {}
+    assert parser.stats.slowest_records() == []
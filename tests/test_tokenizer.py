@@ -0,0 +1,146 @@
+import pickle
+import pytest
+from pybtexnbib.tokenizer import (
+    NBIBField,
+    NBIBRecord,
+    LineTokenizer,
+    tokenize,
+    tokenize_buffer,
+    iter_record_spans,
+    find_record_ranges,
+    is_ascii_compatible,
+)
+
+
+def test_tokenize_continuation_lines():
+    records = list(
+        tokenize(
+            [
+                "PMID- 1\n",
+                "TI  - A title which continues\n",
+                "      onto the next line.\n",
+                "AB  - An abstract mentioning ER  - in the text\n",
+                "      AND - a line which looks like a tag.\n",
+                "ER  - \n",
+            ]
+        )
+    )
+    assert records == [
+        NBIBRecord(
+            [
+                ("PMID", "1"),
+                ("TI", "A title which continuesonto the next line."),
+                ("AB", "An abstract mentioning ER  - in the textAND - a line which looks like a tag."),
+            ]
+        )
+    ]
+
+
+def test_tokenize_record_boundaries():
+    records = list(tokenize(["PMID- 1", "ER  -", "PMID- 2", "", "", "PMID- 3", "ER  -", ""]))
+    assert records == [NBIBRecord([("PMID", "1")]), NBIBRecord([("PMID", "2")]), NBIBRecord([("PMID", "3")])]
+
+
+def test_tokenize_indented_tags():
+    records = list(tokenize(["    TI  - Title", "        continued", "    DP  - 2022"]))
+    assert records == [NBIBRecord([("TI", "Titlecontinued"), ("DP", "2022")])]
+
+
+def test_tokenize_invalid_first_line():
+    with pytest.warns(UserWarning, match="First line of NBIB file 'Invalid first line' is invalid."):
+        records = list(tokenize(["Invalid first line", "TI  - Title"]))
+    assert records == [NBIBRecord([("TI", "Title")])]
+
+
+def test_iter_record_spans():
+    text = "PMID- 1\r\nTI  - Café\r\n      au lait\r\nER  - \r\n\r\n  PMID- 2\n  DP  - 2022\n\n"
+    buffer = text.encode("utf-8")
+    spans = list(iter_record_spans(buffer, "utf-8"))
+    assert [fields for _, _, fields in spans] == [
+        NBIBRecord([("PMID", "1"), ("TI", "Caféau lait")]),
+        NBIBRecord([("PMID", "2"), ("DP", "2022")]),
+    ]
+    assert [fields for _, _, fields in spans] == list(tokenize(text.splitlines()))
+
+    # Each span can be parsed again on its own
+    for start, end, fields in spans:
+        assert list(tokenize_buffer(buffer[start:end])) == [fields]
+
+
+def test_find_record_ranges():
+    buffer = b"".join(b"PMID- %d\nTI  - Title\n      ER  - continued\n\n" % i for i in range(100))
+    ranges = find_record_ranges(buffer, chunk_size=100)
+    assert len(ranges) > 1
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == len(buffer)
+    records = [record for start, end in ranges for record in tokenize_buffer(buffer, start=start, end=end)]
+    assert records == list(tokenize_buffer(buffer))
+    assert len(records) == 100
+
+
+def test_is_ascii_compatible():
+    assert is_ascii_compatible("utf-8")
+    assert is_ascii_compatible("latin-1")
+    assert not is_ascii_compatible("utf-16")
+
+
+def test_tokenize_codes():
+    lines = [
+        "PMID- 1",
+        "AB  - A long abstract",
+        "      continued here.",
+        "TI  - Title",
+        "      continued.",
+        "",
+        "PMID- 2",
+        "AB  - Only an abstract",
+    ]
+    expected = [
+        NBIBRecord([("PMID", "1"), ("TI", "Titlecontinued.")]),
+        NBIBRecord([("PMID", "2")]),
+    ]
+    assert list(tokenize(lines, codes={"PMID", "TI"})) == expected
+    assert list(tokenize_buffer("\n".join(lines).encode("utf-8"), codes={"PMID", "TI"})) == expected
+
+
+def test_tokenize_codes_keeps_empty_records():
+    lines = ["AB  - Abstract", "", "AB  - Abstract", "ER  -"]
+    assert list(tokenize(lines, codes={"PMID"})) == [NBIBRecord(), NBIBRecord()]
+    assert list(tokenize_buffer("\n".join(lines).encode("utf-8"), codes={"PMID"})) == [NBIBRecord(), NBIBRecord()]
+
+
+def test_record():
+    record = NBIBRecord([NBIBField("PMID", "1"), ("AID", "a [pii]"), ("AID", "10.1/x [doi]")])
+    assert len(record) == 3
+    assert list(record) == [("PMID", "1"), ("AID", "a [pii]"), ("AID", "10.1/x [doi]")]
+    assert record.get("PMID") == "1"
+    assert record.get("TI") is None
+    assert record.get_all("AID") == ["a [pii]", "10.1/x [doi]"]
+    assert record.fields()[0] == NBIBField("PMID", "1")
+    assert not NBIBRecord()
+
+
+def test_record_pickle_and_interned_codes():
+    records = list(tokenize(["PMID- 1", "TI  - One", "", "PMID- 2", "TI  - Two"]))
+    assert records[0].codes[0] is records[1].codes[0]
+
+    unpickled = pickle.loads(pickle.dumps(records))
+    assert unpickled == records
+    assert unpickled[1].codes[1] is records[0].codes[1]
+
+
+def test_tokenize_many_continuation_lines():
+    lines = ["PMID- 1", "AB  - Start"] + [f"      {index}" for index in range(1000)] + ["AD  - One", "      Two"]
+    expected = NBIBRecord(
+        [("PMID", "1"), ("AB", "Start" + "".join(str(index) for index in range(1000))), ("AD", "OneTwo")]
+    )
+    assert list(tokenize(lines)) == [expected]
+    assert list(tokenize_buffer("\n".join(lines).encode("utf-8"))) == [expected]
+
+
+def test_line_tokenizer_batches():
+    tokenizer = LineTokenizer()
+    assert list(tokenizer.feed(["PMID- 1", "TI  - Split"])) == []
+    assert list(tokenizer.feed(["      title", "", "PMID- 2"])) == [NBIBRecord([("PMID", "1"), ("TI", "Splittitle")])]
+    assert list(tokenizer.close()) == [NBIBRecord([("PMID", "2")])]
+    assert list(tokenizer.close()) == []
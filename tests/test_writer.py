@@ -0,0 +1,91 @@
+import io
+import pkg_resources
+from pybtex.database import Entry, Person, parse_file, parse_string
+
+from pybtexnbib import NBIBParser, NBIBWriter
+
+from .test_parsers import files_dir, marcelis
+
+
+def test_round_trip():
+    text = NBIBWriter().to_string(marcelis)
+    assert text.startswith("PMID- 20301770\nPT  - Review\nPT  - Book Chapter\nTI  - Feingold Syndrome 1.\n")
+    assert "FAU - de Brouwer, Arjan PM\n" in text
+    assert "OT  - ODED Syndrome\n" in text
+    assert NBIBParser(cache=None).parse_string(text) == marcelis
+
+
+def test_round_trip_file(tmp_path):
+    path = tmp_path / "marcelis.nbib"
+    with open(path, "w", encoding="utf-8") as f:
+        NBIBWriter().write_entries(NBIBParser(cache=None).iter_entries(files_dir / "marcelis-20301770.nbib"), f)
+    entry = NBIBParser(cache=None).parse_file(path).entries["Marcelis1993"]
+    assert entry.fields["abstract"] == marcelis.entries["Marcelis1993"].fields["abstract"]
+    assert entry.fields["AD"] == marcelis.entries["Marcelis1993"].fields["AD"]
+    assert NBIBParser(cache=None).parse_file(path) == marcelis
+
+
+def test_wrapping():
+    text = NBIBWriter(width=80).to_string(marcelis)
+    lines = text.splitlines()
+    assert all(len(line) <= 80 for line in lines)
+    abstract_start = next(i for i, line in enumerate(lines) if line.startswith("AB  - "))
+    assert lines[abstract_start + 1].startswith("      ") and lines[abstract_start + 1][6] != " "
+
+
+def test_bibtex_entry():
+    bib_data = parse_file(str(files_dir / "Knuth1986.bib"))
+    bib_data.entries["Knuth1986"].fields["doi"] = "10.1000/xyz"
+    text = NBIBWriter().to_string(bib_data)
+    assert "FAU - Knuth, Donald E.\n" in text
+    assert "AID - 10.1000/xyz [doi]\n" in text
+    assert "DP  - 1986\n" in text
+    assert "PT  - Monograph\n" in text
+    result = NBIBParser(cache=None).parse_string(text)
+    entry = result.entries["Knuth1986"]
+    assert entry.type == "book"
+    assert entry.fields["doi"] == "10.1000/xyz"
+
+
+def test_mixed_case_bibtex_fields():
+    bib_data = parse_string(
+        "@article{Smith2020, Title = {A Title}, Journal = {A Journal}, YEAR = {2020}, DOI = {10.1/x}, ISBN = {123}, "
+        "LA = {eng}, Author = {Smith, John}}",
+        "bibtex",
+    )
+    lines = NBIBWriter().to_string(bib_data).splitlines()
+    for line in ["TI  - A Title", "JT  - A Journal", "DP  - 2020", "AID - 10.1/x [doi]", "ISBN- 123", "LA  - eng"]:
+        assert line in lines
+    assert not any(line.startswith(("YEAR", "DOI")) for line in lines)
+
+
+def test_write_entries_incrementally():
+    stream = io.StringIO()
+    writer = NBIBWriter()
+    entries = NBIBParser(cache=None).iter_entries(files_dir / "marcelis-20301770.nbib")
+    writer.write_entries(entries, stream)
+    entry = Entry(
+        "article",
+        fields={"title": "Second", "PMID": "2"},
+        persons={"author": [Person("Smith, John")]},
+    )
+    writer.write_entry(entry, stream)
+    result = NBIBParser(cache=None).parse_string(stream.getvalue())
+    assert list(result.entries.keys()) == ["Marcelis1993", "Smith"]
+    assert result.entries["Smith"].fields["type"] == "Journal Article"
+
+
+def test_database_output():
+    entry_points = [
+        entry_point
+        for entry_point in pkg_resources.iter_entry_points("pybtex.database.output")
+        if entry_point.name == "nbib"
+    ]
+    assert len(entry_points) == 1
+    assert entry_points[0].load() == NBIBWriter
+    suffixes = [
+        entry_point
+        for entry_point in pkg_resources.iter_entry_points("pybtex.database.output.suffixes")
+        if entry_point.name == ".nbib"
+    ]
+    assert suffixes[0].load() == NBIBWriter